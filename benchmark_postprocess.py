@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from google.cloud import discoveryengine_v1
+from fake_responses import make_search_response
+from postprocess import PostProcessor
+
+
+def _run(processor: PostProcessor, payloads: List[bytes], concurrency: int) -> float:
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in executor.map(processor.process_payload, payloads):
+            pass
+    return time.perf_counter() - start_time
+
+
+def benchmark(requests: int, concurrency: int, worker_counts: List[int], backend: str) -> List[Dict[str, Any]]:
+    payloads = [
+        discoveryengine_v1.SearchResponse.serialize(
+            make_search_response(f"запит {i % 50}", results=10, snippets=3, summary_bullets=30, seed=i)
+        )
+        for i in range(requests)
+    ]
+    payload_bytes = len(payloads[0])
+
+    rows = []
+    inline = PostProcessor("inline")
+    duration = _run(inline, payloads, concurrency)
+    rows.append({"backend": "inline", "workers": 1, "rps": round(requests / duration, 1), "payload_bytes": payload_bytes})
+
+    for workers in worker_counts:
+        processor = PostProcessor(backend, workers=workers)
+        _run(processor, payloads[:workers * 2], concurrency)
+        duration = _run(processor, payloads, concurrency)
+        processor.shutdown()
+        rows.append({"backend": backend, "workers": workers, "rps": round(requests / duration, 1), "payload_bytes": payload_bytes})
+
+    baseline = rows[0]["rps"]
+    for row in rows:
+        row["speedup"] = round(row["rps"] / baseline, 2)
+    return rows
+
+
+def main_cli() -> None:
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2, max(1, cpu_count // 2), cpu_count})
+
+    parser = argparse.ArgumentParser(description="Бенчмарк постобробки відповідей Discovery Engine")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Кількість потоків запитів")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--backend", choices=["process", "interpreter"], default="process")
+    args = parser.parse_args()
+
+    rows = benchmark(args.requests, args.concurrency, args.workers, args.backend)
+    for row in rows:
+        print(f"{row['backend']:>12} workers={row['workers']:<3} {row['rps']:>9} resp/s  x{row['speedup']}")
+    print(json.dumps(rows, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main_cli()
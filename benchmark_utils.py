@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from fake_responses import SUBJECTS, EXTENSIONS, make_snippet, make_summary_bullets
+from utils import clean_html_text, split_snippet_to_bullets, format_summary, get_file_emoji, extract_filename_from_title
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_utils_baseline.json")
+DEFAULT_THRESHOLD = 1.5
+ADVERSARIAL_SIZE = 200_000
+ADVERSARIAL_BUDGET = 0.25
+MIN_BATCH_TIME = 10e-6
+CALIBRATION_LOOPS = 20_000
+
+Case = Tuple[Callable[[str], Any], List[str]]
+
+
+def _make_summary_text(rng: random.Random, bullets: int) -> str:
+    return " ".join(f"{line} [{k + 1}]" for k, line in enumerate(make_summary_bullets(rng, bullets)))
+
+
+def _make_titles(rng: random.Random, count: int) -> List[str]:
+    return [f"{rng.choice(SUBJECTS)} {i}{rng.choice(EXTENSIONS)}" for i in range(count)]
+
+
+def build_corpus(seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(seed)
+    return {
+        "small": {
+            "snippet": make_snippet(rng, sentences=1),
+            "summary": _make_summary_text(rng, 1),
+            "titles": _make_titles(rng, 5)
+        },
+        "typical": {
+            "snippet": make_snippet(rng, sentences=3),
+            "summary": _make_summary_text(rng, 10),
+            "titles": _make_titles(rng, 10)
+        },
+        "pathological": {
+            "snippet": make_snippet(rng, sentences=400),
+            "summary": _make_summary_text(rng, 300),
+            "titles": _make_titles(rng, 10) + ["Звіт " * 2000 + ".pdf"]
+        }
+    }
+
+
+def build_adversarial(size: int = ADVERSARIAL_SIZE) -> Dict[str, str]:
+    return {
+        "unclosed_tag": "<a href=\"" + "х" * size,
+        "open_brackets": "<" * size,
+        "nested_brackets": "<b" * (size // 2),
+        "entities": "&amp;nbsp;" * (size // 10),
+        "dots_and_spaces": ". " * (size // 2),
+        "bullet_dashes": ".-" * (size // 2),
+        "citation_brackets": "[1" * (size // 2),
+        "no_sentence_breaks": "імпорт" * (size // 6)
+    }
+
+
+def build_cases(corpus: Dict[str, Dict[str, Any]]) -> Dict[str, Case]:
+    cases = {}
+    for name, data in corpus.items():
+        snippet, summary, titles = data["snippet"], data["summary"], data["titles"]
+        cases[f"clean_html_text[{name}]"] = (clean_html_text, [snippet])
+        cases[f"split_snippet_to_bullets[{name}]"] = (split_snippet_to_bullets, [clean_html_text(snippet)])
+        cases[f"format_summary[{name}]"] = (format_summary, [summary])
+        cases[f"get_file_emoji[{name}]"] = (get_file_emoji, titles)
+        cases[f"extract_filename_from_title[{name}]"] = (extract_filename_from_title, titles)
+    return cases
+
+
+def _calibrate() -> float:
+    start_time = time.perf_counter()
+    total = 0
+    for i in range(CALIBRATION_LOOPS):
+        total += i % 7
+    return (time.perf_counter() - start_time) / CALIBRATION_LOOPS
+
+
+def _run_batch(func: Callable[[str], Any], batch: List[str], number: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(number):
+        for item in batch:
+            func(item)
+    return time.perf_counter() - start_time
+
+
+def _make_batch(func: Callable[[str], Any], inputs: List[str]) -> List[str]:
+    batch = list(inputs)
+    while _run_batch(func, batch, 1) < MIN_BATCH_TIME:
+        batch = batch * 2
+    return batch
+
+
+def _measure(func: Callable[[str], Any], inputs: List[str], repeat: int, min_time: float) -> Tuple[float, float]:
+    batch = _make_batch(func, inputs)
+    number = 1
+    while _run_batch(func, batch, number) < min_time:
+        number *= 2
+
+    calls = number * len(batch)
+    seconds, normalized = [], []
+    for _ in range(repeat):
+        calibration = _calibrate()
+        per_call = _run_batch(func, batch, number) / calls
+        seconds.append(per_call)
+        normalized.append(per_call / calibration)
+    return statistics.median(seconds), statistics.median(normalized)
+
+
+def run_benchmarks(pattern: str = "", repeat: int = 9, min_time: float = 0.02) -> Dict[str, Any]:
+    results, normalized = {}, {}
+    for name, (func, inputs) in build_cases(build_corpus()).items():
+        if pattern and not re.search(pattern, name):
+            continue
+        results[name], normalized[name] = _measure(func, inputs, repeat, min_time)
+    return {"results": results, "normalized": normalized}
+
+
+def run_adversarial(size: int = ADVERSARIAL_SIZE) -> List[Tuple[str, str, float]]:
+    functions = {
+        "clean_html_text": clean_html_text,
+        "format_summary": format_summary,
+        "split_snippet_to_bullets": split_snippet_to_bullets,
+        "get_file_emoji": get_file_emoji,
+        "extract_filename_from_title": extract_filename_from_title
+    }
+    timings = []
+    for input_name, text in build_adversarial(size).items():
+        for func_name, func in functions.items():
+            start_time = time.perf_counter()
+            func(text)
+            timings.append((func_name, input_name, time.perf_counter() - start_time))
+    return timings
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    rows = []
+    for name, seconds in current["results"].items():
+        expected = baseline["normalized"].get(name)
+        ratio = current["normalized"][name] / expected if expected else None
+        rows.append({
+            "case": name,
+            "us_per_call": round(seconds * 1e6, 2),
+            "ratio": round(ratio, 2) if ratio is not None else None,
+            "regressed": ratio is not None and ratio > threshold
+        })
+    return rows
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк функцій utils.py з порогами регресії")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Перезаписати базові результати")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Допустиме сповільнення (разів)")
+    parser.add_argument("--filter", default="", help="Регулярний вираз для вибору кейсів")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--adversarial-size", type=int, default=ADVERSARIAL_SIZE)
+    parser.add_argument("--adversarial-budget", type=float, default=ADVERSARIAL_BUDGET,
+                        help="Максимальний час (с) на один ворожий вхід")
+    args = parser.parse_args()
+
+    failed = False
+
+    for func_name, input_name, seconds in run_adversarial(args.adversarial_size):
+        slow = seconds > args.adversarial_budget
+        failed = failed or slow
+        print(f"{'❌' if slow else '✅'} {func_name}[{input_name}] {seconds * 1000:.1f} ms")
+
+    current = run_benchmarks(args.filter, args.repeat)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"💾 Базові результати збережено у {args.baseline}")
+        for name, seconds in current["results"].items():
+            print(f"{name:<48} {seconds * 1e6:>10.2f} us")
+        sys.exit(1 if failed else 0)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    for row in compare(current, baseline, args.threshold):
+        ratio = f"x{row['ratio']}" if row["ratio"] is not None else "нове"
+        print(f"{'❌' if row['regressed'] else '✅'} {row['case']:<48} {row['us_per_call']:>10.2f} us  {ratio}")
+        failed = failed or row["regressed"]
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main_cli()
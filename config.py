@@ -2,10 +2,8 @@ import os
 from typing import Optional
 from dotenv import load_dotenv
 
-if not os.path.exists('.env'):
-    raise FileNotFoundError("❌ .env файл не знайдено!")
-
-load_dotenv()
+if os.path.exists('.env'):
+    load_dotenv()
 
 
 class Config:
@@ -15,6 +13,35 @@ class Config:
     CODE_VERSION: str = "v1.0.0"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "cloud")
+    TENANTS_FILE: str = os.getenv("TENANTS_FILE", "")
+    TENANTS_HOT_RELOAD: bool = os.getenv("TENANTS_HOT_RELOAD", "true").lower() == "true"
+    CREDENTIALS_MODE: str = os.getenv("CREDENTIALS_MODE", "auto")
+    CREDENTIALS_REFRESH_MARGIN: int = int(os.getenv("CREDENTIALS_REFRESH_MARGIN", "300"))
+    SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", "600"))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+    SEARCH_CACHE_MAX_BYTES: int = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    MEMORY_DEBUG: bool = os.getenv("MEMORY_DEBUG", "false").lower() == "true"
+    MEMORY_DEBUG_FRAMES: int = int(os.getenv("MEMORY_DEBUG_FRAMES", "1"))
+    SPELL_CACHE_MAX_ENTRIES: int = int(os.getenv("SPELL_CACHE_MAX_ENTRIES", "5000"))
+    PREWARM_ENABLED: bool = os.getenv("PREWARM_ENABLED", "false").lower() == "true"
+    PREWARM_INTERVAL: int = int(os.getenv("PREWARM_INTERVAL", "60"))
+    PREWARM_BUDGET: int = int(os.getenv("PREWARM_BUDGET", "10"))
+    PREWARM_TOP_K: int = int(os.getenv("PREWARM_TOP_K", "50"))
+    POSTPROCESS_BACKEND: str = os.getenv("POSTPROCESS_BACKEND", "inline")
+    POSTPROCESS_WORKERS: int = int(os.getenv("POSTPROCESS_WORKERS", "0"))
+    POSTPROCESS_MIN_BYTES: int = int(os.getenv("POSTPROCESS_MIN_BYTES", "16384"))
+    CAPTURE_DIR: str = os.getenv("CAPTURE_DIR", "")
+    CAPTURE_SAMPLE_RATE: float = float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0"))
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_USER_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "10"))
+    RATE_LIMIT_USER_BURST: int = int(os.getenv("RATE_LIMIT_USER_BURST", "3"))
+    RATE_LIMIT_SPACE_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_SPACE_PER_MINUTE", "60"))
+    RATE_LIMIT_SPACE_BURST: int = int(os.getenv("RATE_LIMIT_SPACE_BURST", "10"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+    RATE_LIMIT_SWEEP_INTERVAL: float = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))
+    SEARCH_MAX_CONCURRENT: int = int(os.getenv("SEARCH_MAX_CONCURRENT", "8"))
+    SEARCH_QUEUE_MAX_WAITING: int = int(os.getenv("SEARCH_QUEUE_MAX_WAITING", "32"))
+    SEARCH_QUEUE_TIMEOUT: float = float(os.getenv("SEARCH_QUEUE_TIMEOUT", "5"))
 
     @property
     def SERVICE_ACCOUNT_FILE(self) -> Optional[str]:
@@ -30,11 +57,15 @@ class Config:
         return self.ENVIRONMENT.lower() == "cloud"
 
     def validate(self) -> None:
-        required = ["PROJECT_ID", "LOCATION", "SEARCH_ENGINE_ID"]
-        missing = [var for var in required if not getattr(self, var)]
+        if self.TENANTS_FILE:
+            if not os.path.exists(self.TENANTS_FILE):
+                raise ValueError(f"Файл профілів не знайдено: {self.TENANTS_FILE}")
+        else:
+            required = ["PROJECT_ID", "LOCATION", "SEARCH_ENGINE_ID"]
+            missing = [var for var in required if not getattr(self, var)]
 
-        if missing:
-            raise ValueError(f"Відсутні змінні: {', '.join(missing)}")
+            if missing:
+                raise ValueError(f"Відсутні змінні: {', '.join(missing)}")
 
         if self.is_local() and not self.SERVICE_ACCOUNT_FILE:
             raise ValueError("У локальному середовищі потрібен credentials.json")
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+CHECK_ENV = {
+    "PROJECT_ID": "check-project",
+    "LOCATION": "eu",
+    "SEARCH_ENGINE_ID": "check-engine",
+    "ENVIRONMENT": "cloud",
+    "CREDENTIALS_MODE": "anonymous",
+    "LOG_LEVEL": "CRITICAL",
+    "TENANTS_HOT_RELOAD": "false",
+}
+
+for key, value in CHECK_ENV.items():
+    os.environ.setdefault(key, value)
+
+import rsa  # noqa: E402
+from google.auth import compute_engine  # noqa: E402
+from google.auth.transport import grpc as auth_grpc  # noqa: E402
+from google.oauth2 import service_account  # noqa: E402
+from gcp_clients import CredentialManager, prepare_credentials, create_search_client  # noqa: E402
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FakeTokenEndpoint:
+    def __init__(self, lifetime: float, failures: int = 0) -> None:
+        self.lifetime = lifetime
+        self.failures = failures
+        self.calls: List[float] = []
+
+    def __call__(self) -> 'FakeTokenEndpoint':
+        return self
+
+    def issue(self) -> datetime:
+        self.calls.append(time.monotonic())
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("token endpoint unavailable")
+        return _utcnow() + timedelta(seconds=self.lifetime)
+
+
+class FakeCredentials:
+    def __init__(self, token: Optional[str] = None, expiry: Optional[datetime] = None) -> None:
+        self.token = token
+        self.expiry = expiry
+        self.expired_at_refresh: List[bool] = []
+
+    def refresh(self, endpoint: FakeTokenEndpoint) -> None:
+        self.expired_at_refresh.append(self.expiry is not None and self.expiry <= _utcnow())
+        self.expiry = endpoint.issue()
+        self.token = f"token-{len(endpoint.calls)}"
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def check_refresh_before_expiry() -> List[str]:
+    endpoint = FakeTokenEndpoint(lifetime=1.3)
+    credentials = FakeCredentials(token="initial", expiry=_utcnow() + timedelta(seconds=1.3))
+    manager = CredentialManager(credentials, refresh_margin=1.0, retry_interval=0.05, request_factory=endpoint)
+
+    manager.start()
+    refreshed = _wait_for(lambda: len(endpoint.calls) >= 2, timeout=2.0)
+    manager.stop()
+
+    errors = []
+    if not refreshed:
+        errors.append(f"очікували 2 оновлення, отримали {len(endpoint.calls)}")
+    if any(credentials.expired_at_refresh):
+        errors.append("токен оновлено вже після закінчення строку дії")
+    return errors
+
+
+def check_backoff_and_reset() -> List[str]:
+    endpoint = FakeTokenEndpoint(lifetime=3600, failures=3)
+    credentials = FakeCredentials()
+    manager = CredentialManager(credentials, refresh_margin=300, retry_interval=0.1, max_retry_interval=0.25,
+                                request_factory=endpoint)
+
+    manager.start()
+    _wait_for(lambda: len(endpoint.calls) >= 2, timeout=1.0)
+    failing_metrics = manager.metrics
+    _wait_for(lambda: manager.metrics["refresh_count"] >= 1, timeout=2.0)
+    manager.stop()
+
+    errors = []
+    gaps = [later - earlier for earlier, later in zip(endpoint.calls, endpoint.calls[1:])]
+    expected = [0.1, 0.2, 0.25]
+    if len(gaps) != len(expected):
+        errors.append(f"очікували {len(expected) + 1} викликів, отримали {len(endpoint.calls)}")
+    for gap, target in zip(gaps, expected):
+        if not target * 0.9 <= gap <= target + 0.15:
+            errors.append(f"пауза {gap:.3f}с замість {target}с")
+
+    if failing_metrics["consecutive_failures"] < 1 or not failing_metrics["last_error"]:
+        errors.append(f"метрики під час збоїв: {failing_metrics}")
+
+    metrics = manager.metrics
+    expected_metrics = {"refresh_count": 1, "failure_count": 3, "consecutive_failures": 0, "last_error": None}
+    for name, value in expected_metrics.items():
+        if metrics[name] != value:
+            errors.append(f"{name}={metrics[name]}, очікували {value}")
+    if metrics["last_refresh_latency_ms"] is None or metrics["max_refresh_latency_ms"] is None:
+        errors.append("не записано затримку оновлення")
+    if metrics["last_refresh_at"] is None:
+        errors.append("не записано час оновлення")
+    if not 3590 <= (metrics["expires_in_seconds"] or 0) <= 3600:
+        errors.append(f"expires_in_seconds={metrics['expires_in_seconds']}")
+    return errors
+
+
+def check_stop() -> List[str]:
+    endpoint = FakeTokenEndpoint(lifetime=0.3)
+    credentials = FakeCredentials()
+    manager = CredentialManager(credentials, refresh_margin=0.2, retry_interval=0.05, request_factory=endpoint)
+
+    manager.start()
+    _wait_for(lambda: len(endpoint.calls) >= 2, timeout=1.0)
+
+    start_time = time.monotonic()
+    manager.stop()
+    stop_duration = time.monotonic() - start_time
+    calls_after_stop = len(endpoint.calls)
+    time.sleep(0.3)
+
+    errors = []
+    if stop_duration > 0.2:
+        errors.append(f"stop() тривав {stop_duration:.3f}с")
+    if len(endpoint.calls) != calls_after_stop:
+        errors.append("оновлення продовжились після stop()")
+
+    manager.start()
+    restarted = _wait_for(lambda: len(endpoint.calls) > calls_after_stop, timeout=1.0)
+    manager.stop()
+    if not restarted:
+        errors.append("повторний start() не відновив оновлення")
+    return errors
+
+
+def _make_service_account_credentials() -> service_account.Credentials:
+    _, private_key = rsa.newkeys(1024)
+    return service_account.Credentials.from_service_account_info({
+        "type": "service_account",
+        "client_email": "check@check-project.iam.gserviceaccount.com",
+        "private_key": private_key.save_pkcs1().decode("ascii"),
+        "token_uri": "https://oauth2.googleapis.com/token",
+    })
+
+
+def check_channel_uses_managed_credentials() -> List[str]:
+    channel_credentials = []
+    original_init = auth_grpc.AuthMetadataPlugin.__init__
+
+    def capture(plugin, credentials, *args, **kwargs) -> None:
+        channel_credentials.append(credentials)
+        original_init(plugin, credentials, *args, **kwargs)
+
+    errors = []
+    auth_grpc.AuthMetadataPlugin.__init__ = capture
+    try:
+        for name, factory in (("service_account", _make_service_account_credentials),
+                              ("compute_engine", compute_engine.Credentials)):
+            credentials = prepare_credentials(factory())
+            manager = CredentialManager(credentials)
+            channel_credentials.clear()
+            create_search_client(credentials, "eu")
+            if not channel_credentials or channel_credentials[-1] is not manager._credentials:
+                errors.append(f"{name}: канал використовує інший об'єкт credentials, ніж CredentialManager")
+    finally:
+        auth_grpc.AuthMetadataPlugin.__init__ = original_init
+    return errors
+
+
+CHECKS = {
+    "оновлення до закінчення строку": check_refresh_before_expiry,
+    "експоненційна пауза і скидання після успіху": check_backoff_and_reset,
+    "зупинка фонового потоку": check_stop,
+    "канал gRPC використовує керовані credentials": check_channel_uses_managed_credentials,
+}
+
+
+def main_cli() -> None:
+    failed = False
+    for name, check in CHECKS.items():
+        errors = check()
+        failed = failed or bool(errors)
+        print(f"{'❌' if errors else '✅'} {name}")
+        for error in errors:
+            print(f"   - {error}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main_cli()
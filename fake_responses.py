@@ -0,0 +1,95 @@
+import random
+from typing import List, Optional
+from google.cloud import discoveryengine_v1
+
+SUBJECTS = [
+    "Імпорт прайсів", "Налаштування системи", "Звіт про продажі", "Облік складу", "Інтеграція з 1С",
+    "Модуль замовлень", "Довідник контрагентів", "Резервне копіювання", "Права доступу", "Шаблон договору"
+]
+ACTIONS = [
+    "виконується через меню адміністратора", "потребує перевірки формату файлу", "запускається щоночі автоматично",
+    "налаштовується у розділі параметрів", "доступний лише для ролі менеджера", "оновлює ціни за курсом НБУ",
+    "зберігає історію змін за останні 90 днів", "підтримує файли Excel та CSV"
+]
+DETAILS = [
+    "Перед запуском переконайтеся, що колонки мають правильні назви",
+    "Помилки відображаються у журналі подій",
+    "Для великих файлів обробка може тривати до 10 хвилин",
+    "Після завершення користувач отримує сповіщення",
+    "Зміни набувають чинності після перезавантаження сторінки"
+]
+EXTENSIONS = [".pdf", ".docx", ".xlsx", ".csv", ""]
+
+
+def make_sentence(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.choice(SUBJECTS)} {rng.choice(ACTIONS)}."
+    return f"{rng.choice(DETAILS)}."
+
+
+def make_snippet(rng: random.Random, sentences: int = 3) -> str:
+    words = " ".join(make_sentence(rng) for _ in range(sentences)).split(" ")
+    for i in rng.sample(range(len(words)), k=min(2, len(words))):
+        words[i] = f"<b>{words[i]}</b>"
+    return " ".join(words).replace("Помилки", "Помилки&nbsp;та&nbsp;попередження", 1)
+
+
+def make_summary_bullets(rng: random.Random, bullets: int = 10) -> List[str]:
+    return [f"• {make_sentence(rng)} {make_sentence(rng)}" for _ in range(bullets)]
+
+
+def make_search_response(query: str, results: int = 10, snippets: int = 3, summary_bullets: int = 10,
+                         seed: Optional[int] = None) -> discoveryengine_v1.SearchResponse:
+    rng = random.Random(seed if seed is not None else query)
+    response = discoveryengine_v1.SearchResponse()
+    references = []
+
+    for i in range(results):
+        name = f"projects/demo/locations/eu/collections/default_collection/dataStores/docs/branches/0/documents/doc-{i}"
+        title = f"{rng.choice(SUBJECTS)} {i + 1}{rng.choice(EXTENSIONS)}"
+        link = f"gs://demo-docs/{query.replace(' ', '_')}/doc-{i}.pdf"
+        derived = {
+            "title": title,
+            "link": link,
+            "snippets": [
+                {"snippet": make_snippet(rng), "snippet_status": "SUCCESS"}
+                for _ in range(snippets)
+            ]
+        }
+        response.results.append(discoveryengine_v1.SearchResponse.SearchResult(
+            id=f"doc-{i}",
+            document=discoveryengine_v1.Document(name=name, id=f"doc-{i}", derived_struct_data=derived)
+        ))
+        references.append(discoveryengine_v1.SearchResponse.Summary.Reference(title=title, document=name, uri=link))
+
+    lines = make_summary_bullets(rng, summary_bullets)
+    text = "\n".join(lines)
+    citations, offset = [], 0
+    for line in lines:
+        if results:
+            citations.append(discoveryengine_v1.SearchResponse.Summary.Citation(
+                start_index=offset,
+                end_index=offset + len(line.encode('utf-8')),
+                sources=[discoveryengine_v1.SearchResponse.Summary.CitationSource(reference_index=rng.randrange(results))]
+            ))
+        offset += len(line.encode('utf-8')) + 1
+
+    response.summary = discoveryengine_v1.SearchResponse.Summary(
+        summary_text=" ".join(f"{line} [{k + 1}]" for k, line in enumerate(lines)),
+        summary_with_metadata=discoveryengine_v1.SearchResponse.Summary.SummaryWithMetadata(
+            summary=text,
+            citation_metadata=discoveryengine_v1.SearchResponse.Summary.CitationMetadata(citations=citations),
+            references=references
+        )
+    )
+    return response
+
+
+class FakeSearchClient:
+    def __init__(self, results: int = 10, snippets: int = 3, summary_bullets: int = 10) -> None:
+        self._results = results
+        self._snippets = snippets
+        self._summary_bullets = summary_bullets
+
+    def search(self, request: discoveryengine_v1.SearchRequest) -> discoveryengine_v1.SearchResponse:
+        return make_search_response(request.query, self._results, self._snippets, self._summary_bullets)
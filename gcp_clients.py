@@ -1,23 +1,155 @@
-from typing import Dict, Optional, Any
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any, Callable, Tuple
 from google.cloud import discoveryengine_v1
 from google.oauth2 import service_account
 from google.auth import default
+from google.api_core import gapic_v1
+from google.auth.credentials import AnonymousCredentials, with_scopes_if_required
+from google.auth.transport.requests import Request as AuthRequest
+from google.cloud.discoveryengine_v1.services.search_service.transports import SearchServiceGrpcTransport
 from config import config
 from logger import get_logger
+from tenants import tenants, TenantProfile
 
 logger = get_logger(__name__)
 
+SEARCH_METHOD = "/google.cloud.discoveryengine.v1.SearchService/Search"
+
+
+class CredentialManager:
+    def __init__(self, credentials, refresh_margin: float = 300, retry_interval: float = 5,
+                 max_retry_interval: float = 60, request_factory: Callable[[], Any] = AuthRequest) -> None:
+        self._credentials = credentials
+        self._refresh_margin = refresh_margin
+        self._retry_interval = retry_interval
+        self._max_retry_interval = max_retry_interval
+        self._request_factory = request_factory
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics = {
+            "refresh_count": 0,
+            "failure_count": 0,
+            "consecutive_failures": 0,
+            "last_refresh_latency_ms": None,
+            "max_refresh_latency_ms": None,
+            "last_refresh_at": None,
+            "last_error": None,
+        }
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+        expiry = self._credentials.expiry
+        metrics["expires_in_seconds"] = round(self._seconds_until(expiry), 1) if expiry else None
+        return metrics
+
+    @staticmethod
+    def _seconds_until(expiry: datetime) -> float:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (expiry - now).total_seconds()
+
+    def refresh_now(self) -> bool:
+        start_time = time.perf_counter()
+        try:
+            self._credentials.refresh(self._request_factory())
+        except Exception as e:
+            with self._lock:
+                self._metrics["failure_count"] += 1
+                self._metrics["consecutive_failures"] += 1
+                self._metrics["last_error"] = str(e)
+            logger.error(f"❌ Помилка оновлення токена: {e}")
+            return False
+
+        latency_ms = round((time.perf_counter() - start_time) * 1000, 1)
+        with self._lock:
+            self._metrics["refresh_count"] += 1
+            self._metrics["consecutive_failures"] = 0
+            self._metrics["last_refresh_latency_ms"] = latency_ms
+            self._metrics["max_refresh_latency_ms"] = max(self._metrics["max_refresh_latency_ms"] or 0, latency_ms)
+            self._metrics["last_refresh_at"] = time.time()
+            self._metrics["last_error"] = None
+        logger.info(f"🔑 Токен оновлено за {latency_ms}мс")
+        return True
+
+    def _next_delay(self) -> float:
+        failures = self._metrics["consecutive_failures"]
+        if failures:
+            return min(self._retry_interval * 2 ** (failures - 1), self._max_retry_interval)
+
+        if not self._credentials.token:
+            return 0
+
+        expiry = self._credentials.expiry
+        if expiry is None:
+            return self._refresh_margin
+        return max(self._retry_interval, self._seconds_until(expiry) - self._refresh_margin)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._next_delay()):
+            self.refresh_now()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="credential-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def prepare_credentials(credentials):
+    credentials = with_scopes_if_required(credentials, scopes=SearchServiceGrpcTransport.AUTH_SCOPES)
+    if isinstance(credentials, service_account.Credentials):
+        credentials = credentials.with_always_use_jwt_access(True)
+    return credentials
+
+
+def create_search_client(credentials, location: str) -> discoveryengine_v1.SearchServiceClient:
+    transport = SearchServiceGrpcTransport(
+        host=f"{location}-discoveryengine.googleapis.com",
+        credentials=credentials,
+        always_use_jwt_access=False
+    )
+    return discoveryengine_v1.SearchServiceClient(transport=transport)
+
+
+def create_raw_search(client: discoveryengine_v1.SearchServiceClient) -> Callable[[discoveryengine_v1.SearchRequest], bytes]:
+    method = client._transport.grpc_channel.unary_unary(
+        SEARCH_METHOD,
+        request_serializer=discoveryengine_v1.SearchRequest.serialize,
+        response_deserializer=None
+    )
+
+    def search(request: discoveryengine_v1.SearchRequest) -> bytes:
+        metadata = [gapic_v1.routing_header.to_grpc_metadata((("serving_config", request.serving_config),))]
+        return method(request, metadata=metadata)
+
+    return search
+
 
 class GCPClients:
     _instance: Optional['GCPClients'] = None
     _clients: Optional[Dict[str, Any]] = None
+    _request_templates: Optional[Dict[Tuple[TenantProfile, str], discoveryengine_v1.SearchRequest]] = None
     _credentials = None
+    _credential_manager: Optional[CredentialManager] = None
 
     def __new__(cls) -> 'GCPClients':
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._clients = None
+            cls._instance._request_templates = None
             cls._instance._credentials = None
+            cls._instance._credential_manager = None
         return cls._instance
 
     def __init__(self) -> None:
@@ -28,7 +160,10 @@ class GCPClients:
         logger.info(f"🔧 Ініціалізація GCP клієнтів: {config.ENVIRONMENT}")
 
         try:
-            if config.SERVICE_ACCOUNT_FILE:
+            if config.CREDENTIALS_MODE == "anonymous":
+                logger.info("🕶️ Анонімні credentials (офлайн інструменти)")
+                self._credentials = AnonymousCredentials()
+            elif config.SERVICE_ACCOUNT_FILE:
                 logger.info("🏠 Service Account режим")
                 self._credentials = service_account.Credentials.from_service_account_file(
                     config.SERVICE_ACCOUNT_FILE
@@ -40,29 +175,70 @@ class GCPClients:
             logger.error(f"❌ Помилка ініціалізації credentials: {e}")
             raise
 
+        self._credentials = prepare_credentials(self._credentials)
+        self._credential_manager = CredentialManager(self._credentials, refresh_margin=config.CREDENTIALS_REFRESH_MARGIN)
+        if config.CREDENTIALS_MODE != "anonymous":
+            self._credential_manager.start()
         self._clients = {}
+        self._request_templates = {}
+        tenants.add_listener(self._prune_request_templates)
 
-    def _create_discovery_engine_client(self) -> discoveryengine_v1.SearchServiceClient:
+    def _create_discovery_engine_client(self, location: str) -> discoveryengine_v1.SearchServiceClient:
         try:
-            client_options = {"api_endpoint": f"{config.LOCATION}-discoveryengine.googleapis.com"}
-            return discoveryengine_v1.SearchServiceClient(
-                credentials=self._credentials,
-                client_options=client_options
-            )
+            return create_search_client(self._credentials, location)
         except Exception as e:
             logger.error(f"❌ Помилка створення Discovery Engine клієнта: {e}")
             raise
 
-    def get_client(self, client_type: str) -> Any:
-        if client_type not in self._clients:
+    def override_client(self, client_type: str, client: Any) -> None:
+        self._clients[client_type] = client
+
+    def get_client(self, client_type: str, location: Optional[str] = None) -> Any:
+        if client_type in self._clients:
+            return self._clients[client_type]
+
+        location = location or tenants.get_profile().location
+        key = f"{client_type}:{location}"
+        if key not in self._clients:
             if client_type == 'discovery_engine':
-                self._clients[client_type] = self._create_discovery_engine_client()
+                self._clients[key] = self._create_discovery_engine_client(location)
             else:
                 raise ValueError(f"Невідомий тип клієнта: {client_type}")
-        return self._clients[client_type]
+        return self._clients[key]
+
+    def get_search_client(self, profile: Optional[TenantProfile] = None) -> discoveryengine_v1.SearchServiceClient:
+        return self.get_client('discovery_engine', profile.location if profile else None)
+
+    def get_raw_search(self, profile: Optional[TenantProfile] = None) -> Optional[Callable[[discoveryengine_v1.SearchRequest], bytes]]:
+        if 'discovery_engine' in self._clients:
+            return None
+
+        location = profile.location if profile else tenants.get_profile().location
+        key = f"raw_search:{location}"
+        if key not in self._clients:
+            self._clients[key] = create_raw_search(self.get_search_client(profile))
+        return self._clients[key]
+
+    @property
+    def credential_manager(self) -> CredentialManager:
+        return self._credential_manager
+
+    def get_request_template(
+        self, profile: TenantProfile, builder: Callable[[TenantProfile], discoveryengine_v1.SearchRequest],
+        variant: str = "full"
+    ) -> discoveryengine_v1.SearchRequest:
+        key = (profile, variant)
+        template = self._request_templates.get(key)
+        if template is None:
+            template = builder(profile)
+            self._request_templates[key] = template
+        return template
 
-    def get_search_client(self) -> discoveryengine_v1.SearchServiceClient:
-        return self.get_client('discovery_engine')
+    def _prune_request_templates(self) -> None:
+        active = set(tenants.profiles())
+        for key in list(self._request_templates):
+            if key[0] not in active:
+                self._request_templates.pop(key, None)
 
 
-clients = GCPClients()
\ No newline at end of file
+clients = GCPClients()
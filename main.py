@@ -1,10 +1,21 @@
+import html
 import json
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional
 import functions_framework
-from flask import jsonify, Request
+from flask import jsonify, Request, Response
 from config import config
 from logger import get_logger
-from search_functions import search_vertex_ai_structured
+from search_functions import search_vertex_ai_structured, peek_search_cache
+from tenants import tenants
+from gcp_clients import clients
+from rate_limiter import rate_limiter, search_queue, AdmissionRejected
+from traffic_capture import traffic_recorder
+from search_cache import search_cache
+from prewarm import prewarmer
+from memory_accounting import memory_registry
+from query_normalizer import normalize_query, spell_corrections
+from utils import gcs_to_https, format_citation_links
 
 logger = get_logger(__name__)
 
@@ -18,11 +29,36 @@ except Exception as e:
 logger.info(f"🚀 Запуск Chat Bot версії: {config.CODE_VERSION}")
 
 
+def _prerender_notice_card(title: str, subtitle: str, text: str) -> bytes:
+    return json.dumps({
+        "cardsV2": [{
+            "card": {
+                "header": {"title": title, "subtitle": subtitle},
+                "sections": [{"widgets": [{"textParagraph": {"text": text}}]}]
+            }
+        }]
+    }, ensure_ascii=False).encode('utf-8')
+
+
+RATE_LIMITED_CARD = _prerender_notice_card(
+    "⏳ Забагато запитів",
+    "Ліміт запитів тимчасово вичерпано",
+    "<b>Що можна зробити:</b>\n• Зачекайте хвилину і спробуйте ще раз\n• Об'єднайте кілька питань в один запит"
+)
+
+QUEUE_BUSY_CARD = _prerender_notice_card(
+    "⏳ Бот зараз перевантажений",
+    "Ваш запит не вдалося обробити вчасно",
+    "<b>Що можна зробити:</b>\n• Спробуйте ще раз через кілька секунд"
+)
+
+
 def create_chat_response(message: str) -> Dict[str, Any]:
     return {"text": message}
 
 
-def create_cards_response(query: str, summary: str, results: List[Dict]) -> Dict[str, Any]:
+def create_cards_response(query: str, summary: str, results: List[Dict],
+                          summary_bullets: Optional[List[Dict]] = None) -> bytes:
     logger.info(f"🎯 Створення Cards відповіді: query='{query}', results_count={len(results)}")
 
     cards = [
@@ -35,20 +71,27 @@ def create_cards_response(query: str, summary: str, results: List[Dict]) -> Dict
         }
     ]
 
-    if summary:
+    if summary_bullets:
+        summary_widgets = [
+            {"textParagraph": {"text": f"<b>{html.escape(bullet['text'])}</b>{format_citation_links(bullet['sources'])}"}}
+            for bullet in summary_bullets
+        ]
+    elif summary:
         summary_lines = [line.strip() for line in summary.split('\n') if line.strip()]
         summary_widgets = [
             {"textParagraph": {"text": f"<b>{line}</b>"}}
             for line in summary_lines if line.startswith('•')
         ]
-
-        if summary_widgets:
-            cards.append({
-                "sections": [{
-                    "header": "📄 Підсумок",
-                    "widgets": summary_widgets
-                }]
-            })
+    else:
+        summary_widgets = []
+
+    if summary_widgets:
+        cards.append({
+            "sections": [{
+                "header": "📄 Підсумок",
+                "widgets": summary_widgets
+            }]
+        })
 
     if results:
         results_widgets = []
@@ -56,11 +99,7 @@ def create_cards_response(query: str, summary: str, results: List[Dict]) -> Dict
         for i, result in enumerate(results, 1):
             title = result.get("title", f"Документ {i}")
             snippet = result.get("snippet", "фрагмент відсутній")
-            link = result.get("link", "")
-
-            if link.startswith("gs://"):
-                path = link.replace("gs://", "")
-                link = f"https://storage.cloud.google.com/{path}"
+            link = gcs_to_https(result.get("link", ""))
 
             display_snippet = snippet[:100] + "..." if len(snippet) > 100 else snippet
 
@@ -103,9 +142,9 @@ def create_cards_response(query: str, summary: str, results: List[Dict]) -> Dict
         }]
     })
 
-    response_data = {"cardsV2": [{"card": card} for card in cards]}
+    response_body = json.dumps({"cardsV2": [{"card": card} for card in cards]}, ensure_ascii=False)
 
-    response_size = len(json.dumps(response_data, ensure_ascii=False))
+    response_size = len(response_body)
     if response_size > 30000:
         logger.warning(f"⚠️ Відповідь занадто велика ({response_size} байт), обрізаємо")
         trimmed_cards = cards[:2]
@@ -115,41 +154,43 @@ def create_cards_response(query: str, summary: str, results: List[Dict]) -> Dict
                 original_widgets = results_card['sections'][0].get('widgets', [])
                 results_card['sections'][0]['widgets'] = original_widgets[:3]
             trimmed_cards.append(results_card)
-        response_data = {"cardsV2": [{"card": card} for card in trimmed_cards]}
+        response_body = json.dumps({"cardsV2": [{"card": card} for card in trimmed_cards]}, ensure_ascii=False)
 
-    return response_data
+    return response_body.encode('utf-8')
 
 
 def clean_message_text(text: str) -> str:
-    if text.startswith('<users/'):
-        parts = text.split('> ', 1)
-        text = parts[1].strip() if len(parts) > 1 else text
-
-    text = text.replace('@Vertex AI Search Bot', '').strip()
-
-    if text.startswith('@'):
-        parts = text.split(' ', 1)
-        text = parts[1].strip() if len(parts) > 1 else ""
-
-    return text
+    return normalize_query(text)
 
 
 @functions_framework.http
 def chat_vertex_bot(request: Request):
+    if request.method == 'GET' and 'debug' in request.args and 'memory' in request.args:
+        if not config.MEMORY_DEBUG:
+            return jsonify({"error": "MEMORY_DEBUG вимкнено"}), 404
+        return jsonify({**memory_registry.report(), "snapshot": memory_registry.snapshot()})
+
     if request.method == 'GET' and 'debug' in request.args:
         debug_query = request.args.get('q', 'імпорт прайсів')
+        debug_space = request.args.get('space')
         cleaned_query = clean_message_text(debug_query)
 
         try:
-            search_data = search_vertex_ai_structured(cleaned_query)
+            search_data = search_vertex_ai_structured(cleaned_query, space_id=debug_space)
             return jsonify({
                 "debug": True,
                 "version": config.CODE_VERSION,
+                "profile": tenants.get_profile(debug_space).name,
+                "credentials": clients.credential_manager.metrics,
+                "cache": search_cache.stats,
+                "prewarm": prewarmer.stats,
+                "spell_corrections": spell_corrections.stats,
                 "original_query": debug_query,
                 "cleaned_query": cleaned_query,
                 "results_count": len(search_data['results']),
                 "summary_length": len(search_data['summary']) if search_data['summary'] else 0,
-                "summary_bullets": search_data['summary'].count('•') if search_data['summary'] else 0,
+                "summary_bullets": len(search_data['summary_bullets']),
+                "summary_citations": sum(len(bullet['sources']) for bullet in search_data['summary_bullets']),
                 "results": [{"title": r['title'], "has_snippet": bool(r['snippet'])} for r in search_data['results']]
             })
         except Exception as e:
@@ -190,6 +231,7 @@ def chat_vertex_bot(request: Request):
             })
 
         elif event_type == 'MESSAGE':
+            traffic_recorder.record_event(request_json)
             message_text = request_json.get('message', {}).get('text', '').strip()
 
             if not message_text:
@@ -210,16 +252,34 @@ def chat_vertex_bot(request: Request):
                     "🔍 **Запит занадто короткий**\n\nБудь ласка, введіть запит довжиною щонайменше 3 символи."
                 ))
 
-            logger.info(f"Пошуковий запит: {message_text}")
+            space_id = request_json.get('space', {}).get('name')
+            user_id = request_json.get('user', {}).get('name')
+
+            cached = peek_search_cache(message_text, space_id) is not None
+            if not cached:
+                retry_after = rate_limiter.check(user=user_id, space=space_id)
+                if retry_after > 0:
+                    logger.warning(f"⏳ Ліміт запитів: користувач={user_id}, простір={space_id}, retry_after={retry_after:.1f}с")
+                    return Response(RATE_LIMITED_CARD, mimetype='application/json')
+
+            logger.info(f"Пошуковий запит: {message_text} (простір: {space_id})")
 
             try:
-                search_data = search_vertex_ai_structured(message_text)
-                response = create_cards_response(
+                admission = nullcontext() if cached else search_queue.admit(space_id or user_id or "anonymous")
+                with admission:
+                    search_data = search_vertex_ai_structured(message_text, space_id=space_id)
+                prewarmer.track(message_text, space_id)
+                response_body = create_cards_response(
                     query=search_data["query"],
                     summary=search_data["summary"],
-                    results=search_data["results"]
+                    results=search_data["results"],
+                    summary_bullets=search_data["summary_bullets"]
                 )
-                return jsonify(response)
+                return Response(response_body, mimetype='application/json')
+
+            except AdmissionRejected as rejected:
+                logger.warning(f"⏳ Запит не допущено до пошуку: {rejected.reason}, черга={search_queue.stats}")
+                return Response(QUEUE_BUSY_CARD, mimetype='application/json')
 
             except Exception as search_error:
                 logger.error(f"Помилка пошуку: {search_error}")
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+_ATOMIC_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def estimate_size(obj: Any) -> int:
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+
+        if isinstance(item, _ATOMIC_TYPES):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.append(vars(item))
+
+    return total
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class MemoryRegistry:
+    def __init__(self) -> None:
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def register(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self._sources[name] = stats
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "rss_bytes": rss_bytes(),
+            "tracing": tracemalloc.is_tracing(),
+            "caches": {name: stats() for name, stats in self._sources.items()}
+        }
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"error": "tracemalloc вимкнено, встановіть MEMORY_DEBUG=true"}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self._lock:
+            previous, self._last_snapshot = self._last_snapshot, snapshot
+
+        report = {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": _format_stats(snapshot.statistics('lineno')[:limit])
+        }
+        if previous is not None:
+            report["growth_since_last"] = _format_stats(snapshot.compare_to(previous, 'lineno')[:limit])
+        return report
+
+
+def _format_stats(stats: List[Any]) -> List[Dict[str, Any]]:
+    formatted = []
+    for stat in stats:
+        frame = stat.traceback[0]
+        item = {"location": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count}
+        if hasattr(stat, 'size_diff'):
+            item["size_diff_bytes"] = stat.size_diff
+        formatted.append(item)
+    return formatted
+
+
+memory_registry = MemoryRegistry()
+
+if config.MEMORY_DEBUG and not tracemalloc.is_tracing():
+    tracemalloc.start(config.MEMORY_DEBUG_FRAMES)
+    logger.info(f"🧠 tracemalloc увімкнено ({config.MEMORY_DEBUG_FRAMES} кадрів)")
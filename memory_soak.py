@@ -0,0 +1,97 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+SOAK_ENV = {
+    "PROJECT_ID": "soak-project",
+    "LOCATION": "eu",
+    "SEARCH_ENGINE_ID": "soak-engine",
+    "ENVIRONMENT": "cloud",
+    "CREDENTIALS_MODE": "anonymous",
+    "LOG_LEVEL": "WARNING",
+    "RATE_LIMIT_USER_PER_MINUTE": "0",
+    "RATE_LIMIT_SPACE_PER_MINUTE": "0",
+    "PREWARM_ENABLED": "false",
+    "TENANTS_HOT_RELOAD": "false",
+    "SEARCH_CACHE_MAX_ENTRIES": "256",
+    "SEARCH_CACHE_MAX_BYTES": str(4 * 1024 * 1024),
+}
+
+for key, value in SOAK_ENV.items():
+    os.environ.setdefault(key, value)
+
+from flask import Flask, request  # noqa: E402
+from gcp_clients import clients  # noqa: E402
+from fake_responses import FakeSearchClient  # noqa: E402
+from memory_accounting import memory_registry, rss_bytes  # noqa: E402
+import main  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def _make_event(i: int, distinct_queries: int) -> dict:
+    return {
+        "type": "MESSAGE",
+        "message": {"text": f"інструкція з імпорту прайсів {i % distinct_queries}"},
+        "space": {"name": f"spaces/soak-{i % 50}"},
+        "user": {"name": f"users/{i % 500}"}
+    }
+
+
+def run_soak(total: int, distinct_queries: int, warmup: int, sample_every: int) -> dict:
+    app = Flask("soak")
+    samples = []
+    errors = 0
+    start_time = time.perf_counter()
+
+    for i in range(total):
+        with app.test_request_context('/', method='POST', json=_make_event(i, distinct_queries)):
+            response = app.make_response(main.chat_vertex_bot(request))
+            if response.status_code != 200:
+                errors += 1
+
+        if i + 1 >= warmup and (i + 1) % sample_every == 0:
+            gc.collect()
+            samples.append({"requests": i + 1, "rss_mb": round(rss_bytes() / MB, 2)})
+
+    baseline = samples[0]["rss_mb"] if samples else 0.0
+    peak = max((sample["rss_mb"] for sample in samples), default=0.0)
+    return {
+        "requests": total,
+        "errors": errors,
+        "duration_s": round(time.perf_counter() - start_time, 2),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak,
+        "growth_mb": round(peak - baseline, 2),
+        "samples": samples,
+        "caches": memory_registry.report()["caches"]
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Soak-тест пам'яті вебхука на фейкових відповідях")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--distinct-queries", type=int, default=2000, help="Більше за розмір кешу - перевіряє витіснення")
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--sample-every", type=int, default=250)
+    parser.add_argument("--max-growth-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    clients.override_client('discovery_engine', FakeSearchClient())
+    report = run_soak(args.requests, args.distinct_queries, args.warmup, args.sample_every)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if report["errors"]:
+        print(f"❌ Помилок під час soak-тесту: {report['errors']}")
+        sys.exit(1)
+    if report["growth_mb"] > args.max_growth_mb:
+        print(f"❌ RSS зріс на {report['growth_mb']} МБ (поріг {args.max_growth_mb} МБ)")
+        sys.exit(1)
+    print(f"✅ RSS стабільний: зростання {report['growth_mb']} МБ")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,136 @@
+import os
+import threading
+from concurrent import futures
+from multiprocessing import get_context
+from typing import Dict, Any, List, Optional, Tuple
+from google.cloud import discoveryengine_v1
+from config import config
+from logger import get_logger
+from utils import clean_html_text, extract_filename_from_title, format_summary, build_summary_bullets, gcs_to_https
+
+logger = get_logger(__name__)
+
+ProcessedResponse = Tuple[List[Dict[str, Any]], List[Dict]]
+
+
+def _extract_references(summary_with_metadata, documents: Dict[str, Dict]) -> List[Dict[str, str]]:
+    references = []
+    for reference in summary_with_metadata.references:
+        document = documents.get(reference.document, {})
+        references.append({
+            "title": document.get("title") or extract_filename_from_title(reference.title),
+            "link": gcs_to_https(document.get("link") or reference.uri)
+        })
+    return references
+
+
+def _process_summary(response, documents: Dict[str, Dict]) -> List[Dict[str, Any]]:
+    if not response.summary:
+        return []
+
+    summary_with_metadata = response.summary.summary_with_metadata
+    if summary_with_metadata and summary_with_metadata.summary:
+        citations = [
+            (citation.start_index, citation.end_index, [source.reference_index for source in citation.sources])
+            for citation in summary_with_metadata.citation_metadata.citations
+        ]
+        references = _extract_references(summary_with_metadata, documents)
+        return build_summary_bullets(summary_with_metadata.summary, citations, references)
+
+    if response.summary.summary_text:
+        formatted = format_summary(response.summary.summary_text)
+        return [{"text": line, "sources": []} for line in formatted.split('\n') if line]
+
+    return []
+
+
+def process_search_results(response) -> ProcessedResponse:
+    results = []
+    documents = {}
+    for result in response.results:
+        document = result.document
+        title, snippet, link = "", "", ""
+
+        if hasattr(document, 'derived_struct_data'):
+            derived_data = dict(document.derived_struct_data)
+            title = derived_data.get("title", "")
+            link = derived_data.get("link", "")
+
+            snippets_array = derived_data.get("snippets", [])
+            if snippets_array:
+                snippet_parts = []
+                for snippet_obj in snippets_array:
+                    snippet_dict = dict(snippet_obj)
+                    if snippet_dict.get("snippet_status") == "SUCCESS":
+                        clean_text = clean_html_text(snippet_dict.get("snippet", ""))
+                        if clean_text:
+                            snippet_parts.append(clean_text)
+                snippet = " ".join(snippet_parts)
+
+        filename = extract_filename_from_title(title)
+        results.append({
+            "title": filename,
+            "snippet": snippet or "фрагмент відсутній",
+            "link": link
+        })
+        documents[document.name] = results[-1]
+
+    return _process_summary(response, documents), results
+
+
+def process_serialized_response(payload: bytes) -> Tuple[ProcessedResponse, str]:
+    response = discoveryengine_v1.SearchResponse.deserialize(payload)
+    return process_search_results(response), response.corrected_query
+
+
+class PostProcessor:
+    def __init__(self, backend: str = "inline", workers: int = 0, min_bytes: int = 0) -> None:
+        self.backend = backend
+        self._workers = workers or os.cpu_count() or 1
+        self._min_bytes = min_bytes
+        self._executor: Optional[futures.Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def offloaded(self) -> bool:
+        return self.backend != "inline"
+
+    def _get_executor(self) -> futures.Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _create_executor(self) -> futures.Executor:
+        interpreter_pool = getattr(futures, 'InterpreterPoolExecutor', None)
+        if self.backend == "interpreter" and interpreter_pool is not None:
+            executor = interpreter_pool(max_workers=self._workers)
+        else:
+            if self.backend == "interpreter":
+                logger.warning("⚠️ Субінтерпретатори недоступні, використовуємо пул процесів")
+            executor = futures.ProcessPoolExecutor(max_workers=self._workers, mp_context=get_context("spawn"))
+        logger.info(f"⚙️ Пул постобробки: {type(executor).__name__}, воркерів: {self._workers}")
+        return executor
+
+    def process(self, response: discoveryengine_v1.SearchResponse) -> ProcessedResponse:
+        if not self.offloaded:
+            return process_search_results(response)
+        return self.process_payload(discoveryengine_v1.SearchResponse.serialize(response))[0]
+
+    def process_payload(self, payload: bytes) -> Tuple[ProcessedResponse, str]:
+        if not self.offloaded or len(payload) < self._min_bytes:
+            return process_serialized_response(payload)
+        return self._get_executor().submit(process_serialized_response, payload).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+postprocessor = PostProcessor(
+    backend=config.POSTPROCESS_BACKEND,
+    workers=config.POSTPROCESS_WORKERS,
+    min_bytes=config.POSTPROCESS_MIN_BYTES
+)
@@ -0,0 +1,163 @@
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config import config
+from logger import get_logger
+from search_functions import search_vertex_ai_cached, peek_search_cache
+from tenants import tenants
+from query_normalizer import prepare_query
+
+logger = get_logger(__name__)
+
+QueryKey = Tuple[str, str]
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        self._width = width
+        self._depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * self._depth).digest()
+        return [int.from_bytes(digest[i * 4:(i + 1) * 4], 'little') % self._width for i in range(self._depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(item)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, item: str) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+
+    def decay(self) -> None:
+        for row in self._rows:
+            for i, value in enumerate(row):
+                row[i] = value >> 1
+
+
+class QueryFrequencyTracker:
+    def __init__(self, top_k: int = 50, width: int = 2048, depth: int = 4) -> None:
+        self._sketch = CountMinSketch(width, depth)
+        self._top_k = top_k
+        self._top: Dict[QueryKey, int] = {}
+        self._spaces: Dict[QueryKey, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sketch_key(key: QueryKey) -> str:
+        return f"{key[0]}\x1f{key[1]}"
+
+    def track(self, key: QueryKey, space_id: Optional[str] = None) -> None:
+        with self._lock:
+            estimate = self._sketch.add(self._sketch_key(key))
+            if key not in self._top and len(self._top) >= self._top_k:
+                coldest = min(self._top, key=self._top.get)
+                if estimate <= self._top[coldest]:
+                    return
+                del self._top[coldest]
+                self._spaces.pop(coldest, None)
+
+            self._top[key] = estimate
+            self._spaces[key] = space_id or ""
+
+    def space_for(self, key: QueryKey) -> Optional[str]:
+        return self._spaces.get(key) or None
+
+    def hottest(self, limit: Optional[int] = None) -> List[Tuple[QueryKey, int]]:
+        with self._lock:
+            ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def decay(self) -> None:
+        with self._lock:
+            self._sketch.decay()
+            self._top = {key: self._sketch.estimate(self._sketch_key(key)) for key in self._top}
+            self._top = {key: count for key, count in self._top.items() if count > 0}
+            self._spaces = {key: space for key, space in self._spaces.items() if key in self._top}
+
+
+class QueryPrewarmer:
+    def __init__(self, tracker: QueryFrequencyTracker, interval: float, budget: int,
+                 refresh_before: float, min_hits: int = 2, decay_every: int = 10) -> None:
+        self._tracker = tracker
+        self._interval = interval
+        self._budget = budget
+        self._refresh_before = refresh_before
+        self._min_hits = min_hits
+        self._decay_every = decay_every
+        self._cycles = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"cycles": 0, "refreshed": 0, "failures": 0, "last_cycle_ms": 0.0}
+
+    def track(self, query: str, space_id: Optional[str] = None) -> None:
+        profile = tenants.get_profile(space_id)
+        _, query, _ = prepare_query(query, profile)
+        self._tracker.track((profile.name, query), space_id)
+
+    def run_once(self) -> int:
+        start_time = time.perf_counter()
+        refreshed = 0
+
+        for key, hits in self._tracker.hottest():
+            if refreshed >= self._budget or hits < self._min_hits:
+                break
+
+            query, space_id = key[1], self._tracker.space_for(key)
+            entry = peek_search_cache(query, space_id)
+            if entry is not None and entry.ttl_remaining > self._refresh_before:
+                continue
+
+            try:
+                search_vertex_ai_cached(query, space_id, refresh=True)
+                refreshed += 1
+            except Exception as e:
+                self.stats["failures"] += 1
+                logger.warning(f"⚠️ Не вдалося прогріти запит '{query}': {e}")
+
+        self._cycles += 1
+        if self._cycles % self._decay_every == 0:
+            self._tracker.decay()
+
+        self.stats["cycles"] += 1
+        self.stats["refreshed"] += refreshed
+        self.stats["last_cycle_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        if refreshed:
+            logger.info(f"🔥 Прогріто популярних запитів: {refreshed} за {self.stats['last_cycle_ms']}мс")
+        return refreshed
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Помилка циклу прогріву: {e}")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="query-prewarm", daemon=True)
+        self._thread.start()
+        logger.info(f"🔥 Прогрів кешу: кожні {self._interval}с, бюджет {self._budget} запитів")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+prewarmer = QueryPrewarmer(
+    QueryFrequencyTracker(top_k=config.PREWARM_TOP_K),
+    interval=config.PREWARM_INTERVAL,
+    budget=config.PREWARM_BUDGET,
+    refresh_before=config.PREWARM_INTERVAL * 2
+)
+
+if config.PREWARM_ENABLED:
+    prewarmer.start()
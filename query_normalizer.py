@@ -0,0 +1,133 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Hashable
+from config import config
+from logger import get_logger
+from memory_accounting import memory_registry
+
+logger = get_logger(__name__)
+
+BOT_MENTION = '@Vertex AI Search Bot'
+
+WORD_SEPARATORS = re.compile(r'([-/.])')
+LATIN_ACRONYM = re.compile(r'[A-Z]{2,}')
+
+LATIN_TO_CYRILLIC = str.maketrans({
+    'a': 'а', 'c': 'с', 'e': 'е', 'i': 'і', 'o': 'о', 'p': 'р', 'x': 'х', 'y': 'у',
+    'A': 'А', 'B': 'В', 'C': 'С', 'E': 'Е', 'H': 'Н', 'I': 'І', 'K': 'К', 'M': 'М',
+    'O': 'О', 'P': 'Р', 'T': 'Т', 'X': 'Х'
+})
+CYRILLIC_TO_LATIN = str.maketrans({cyr: lat for lat, cyr in (
+    ('a', 'а'), ('c', 'с'), ('e', 'е'), ('i', 'і'), ('o', 'о'), ('p', 'р'), ('x', 'х'), ('y', 'у'),
+    ('A', 'А'), ('B', 'В'), ('C', 'С'), ('E', 'Е'), ('H', 'Н'), ('I', 'І'), ('K', 'К'), ('M', 'М'),
+    ('O', 'О'), ('P', 'Р'), ('T', 'Т'), ('X', 'Х')
+)})
+
+
+def strip_mentions(text: str) -> str:
+    if text.startswith('<users/'):
+        parts = text.split('> ', 1)
+        text = parts[1].strip() if len(parts) > 1 else text
+
+    text = text.replace(BOT_MENTION, '').strip()
+
+    if text.startswith('@'):
+        parts = text.split(' ', 1)
+        text = parts[1].strip() if len(parts) > 1 else ""
+
+    return text
+
+
+def _is_cyrillic(char: str) -> bool:
+    return 'Ѐ' <= char <= 'ӿ'
+
+
+def _fix_homoglyphs(word: str) -> str:
+    return "".join(_fix_segment(part) for part in WORD_SEPARATORS.split(word))
+
+
+def _fix_segment(word: str) -> str:
+    if LATIN_ACRONYM.search(word):
+        return word
+
+    cyrillic, latin = [], []
+    for char in word:
+        if _is_cyrillic(char):
+            cyrillic.append(char)
+        elif 'a' <= char.lower() <= 'z':
+            latin.append(char)
+
+    if not cyrillic or not latin:
+        return word
+
+    if len(cyrillic) >= len(latin):
+        minority, table = latin, LATIN_TO_CYRILLIC
+    else:
+        minority, table = cyrillic, CYRILLIC_TO_LATIN
+
+    if all(ord(char) in table for char in minority):
+        return word.translate(table)
+    return word
+
+
+def normalize_query(text: str) -> str:
+    text = unicodedata.normalize('NFC', strip_mentions(text))
+    return " ".join(_fix_homoglyphs(word) for word in text.split())
+
+
+class SpellCorrectionCache:
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._corrections: 'OrderedDict[Tuple[Hashable, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            corrected = sum(1 for value in self._corrections.values() if value)
+            return {
+                "entries": len(self._corrections),
+                "corrected": corrected,
+                "max_entries": self._max_entries,
+                "hits": self._hits
+            }
+
+    def lookup(self, scope: Hashable, query: str) -> Optional[str]:
+        key = (scope, query)
+        with self._lock:
+            correction = self._corrections.get(key)
+            if correction is not None:
+                self._corrections.move_to_end(key)
+                self._hits += 1
+            return correction
+
+    def learn(self, scope: Hashable, query: str, corrected_query: str) -> str:
+        corrected_query = normalize_query(corrected_query) if corrected_query else ""
+        if corrected_query == query:
+            corrected_query = ""
+
+        key = (scope, query)
+        with self._lock:
+            self._corrections[key] = corrected_query
+            self._corrections.move_to_end(key)
+            while len(self._corrections) > self._max_entries:
+                self._corrections.popitem(last=False)
+
+        if corrected_query:
+            logger.info(f"✏️ Запам'ятали виправлення: '{query}' → '{corrected_query}'")
+        return corrected_query or query
+
+
+def prepare_query(query: str, scope: Hashable) -> Tuple[str, str, bool]:
+    normalized = normalize_query(query)
+    correction = spell_corrections.lookup(scope, normalized)
+    if correction is None:
+        return normalized, normalized, False
+    return normalized, correction or normalized, True
+
+
+spell_corrections = SpellCorrectionCache(config.SPELL_CACHE_MAX_ENTRIES)
+memory_registry.register("spell_corrections", lambda: spell_corrections.stats)
@@ -0,0 +1,318 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple, Iterator
+from config import config
+from logger import get_logger
+from memory_accounting import memory_registry
+
+logger = get_logger(__name__)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float = 0.0) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def _take(tokens: float, rate: float, cost: float) -> Tuple[float, float]:
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        ...
+
+    @abstractmethod
+    def refund(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> None:
+        ...
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 10000) -> None:
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _, _ = self._buckets.get(key, (capacity, now, rate, capacity))
+            tokens, retry_after = _take(_refill(tokens, updated, now, rate, capacity), rate, cost)
+            self._buckets[key] = (tokens, now, rate, capacity)
+
+            if len(self._buckets) > self._max_keys:
+                self._prune(now)
+
+        return retry_after
+
+    def refund(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated, _, _ = self._buckets[key]
+                refunded = min(capacity, _refill(tokens, updated, now, rate, capacity) + cost)
+                self._buckets[key] = (refunded, now, rate, capacity)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._buckets), "max_keys": self._max_keys}
+
+    def _prune(self, now: float) -> None:
+        full = [key for key, (tokens, updated, rate, capacity) in self._buckets.items()
+                if _refill(tokens, updated, now, rate, capacity) >= capacity]
+        for key in full:
+            del self._buckets[key]
+
+        if len(self._buckets) > self._max_keys:
+            oldest = sorted(self._buckets, key=lambda key: self._buckets[key][1])
+            for key in oldest[:len(self._buckets) - self._max_keys // 2]:
+                del self._buckets[key]
+
+
+class SharedStore(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ttl: float) -> bool:
+        ...
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class LocalSharedStore(SharedStore):
+    def __init__(self, max_keys: int = 10000, sweep_interval: float = 60) -> None:
+        self._data: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ttl: float) -> bool:
+        with self._lock:
+            if self._get(key) != expected:
+                return False
+            now = time.time()
+            self._data[key] = (value, now + ttl)
+
+            if now >= self._next_sweep or len(self._data) > self._max_keys:
+                self._sweep(now)
+            return True
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self._data), "max_keys": self._max_keys}
+
+    def _sweep(self, now: float) -> None:
+        self._next_sweep = now + self._sweep_interval
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+
+        if len(self._data) > self._max_keys:
+            soonest = sorted(self._data, key=lambda key: self._data[key][1])
+            for key in soonest[:len(self._data) - self._max_keys // 2]:
+                del self._data[key]
+
+    def _get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] < time.time():
+            del self._data[key]
+            return None
+        return item[0]
+
+
+class SharedStoreRateLimitBackend(RateLimitBackend):
+    def __init__(self, store: SharedStore, max_attempts: int = 5) -> None:
+        self._store = store
+        self._max_attempts = max_attempts
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        store_key = f"ratelimit:{key}"
+        ttl = capacity / rate + 1.0
+
+        for _ in range(self._max_attempts):
+            now = time.time()
+            current = self._store.get(store_key)
+            tokens, retry_after = _take(self._current_tokens(current, now, rate, capacity), rate, cost)
+            if self._store.compare_and_set(store_key, current, f"{tokens:.4f}:{now:.4f}", ttl):
+                return retry_after
+
+        logger.warning(f"⚠️ Конфлікт оновлення ліміту для {key}, пропускаємо запит")
+        return 0.0
+
+    def refund(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> None:
+        store_key = f"ratelimit:{key}"
+        ttl = capacity / rate + 1.0
+
+        for _ in range(self._max_attempts):
+            now = time.time()
+            current = self._store.get(store_key)
+            if current is None:
+                return
+            tokens = min(capacity, self._current_tokens(current, now, rate, capacity) + cost)
+            if self._store.compare_and_set(store_key, current, f"{tokens:.4f}:{now:.4f}", ttl):
+                return
+
+        logger.warning(f"⚠️ Конфлікт повернення ліміту для {key}")
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self._store.stats
+
+    @staticmethod
+    def _current_tokens(current: Optional[str], now: float, rate: float, capacity: float) -> float:
+        if current is None:
+            return capacity
+        raw_tokens, raw_updated = current.split(":", 1)
+        return _refill(float(raw_tokens), float(raw_updated), now, rate, capacity)
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, rules: Dict[str, Tuple[float, float]]) -> None:
+        self._backend = backend
+        self._rules = rules
+
+    def check(self, **keys: Optional[str]) -> float:
+        consumed = []
+        for scope, key in keys.items():
+            if not key or scope not in self._rules:
+                continue
+            rate, capacity = self._rules[scope]
+            bucket_key = f"{scope}:{key}"
+            retry_after = self._backend.consume(bucket_key, rate, capacity)
+            if retry_after > 0:
+                for consumed_key, consumed_rate, consumed_capacity in consumed:
+                    self._backend.refund(consumed_key, consumed_rate, consumed_capacity)
+                return retry_after
+            consumed.append((bucket_key, rate, capacity))
+        return 0.0
+
+
+class _Ticket:
+    __slots__ = ('key', 'event', 'granted')
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.event = threading.Event()
+        self.granted = False
+
+
+class FairAdmissionQueue:
+    def __init__(self, max_concurrent: int, max_waiting: int, timeout: float) -> None:
+        self._max_concurrent = max_concurrent
+        self._max_waiting = max_waiting
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting: 'OrderedDict[str, deque[_Ticket]]' = OrderedDict()
+        self._waiting_count = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self._active, "waiting": self._waiting_count, "waiting_keys": len(self._waiting)}
+
+    def acquire(self, key: str) -> None:
+        with self._lock:
+            if self._active < self._max_concurrent and not self._waiting:
+                self._active += 1
+                return
+
+            if self._waiting_count >= self._max_waiting:
+                raise AdmissionRejected("queue_full", self._timeout)
+
+            ticket = _Ticket(key)
+            self._waiting.setdefault(key, deque()).append(ticket)
+            self._waiting_count += 1
+
+        if ticket.event.wait(self._timeout):
+            return
+
+        with self._lock:
+            if ticket.granted:
+                return
+            queue = self._waiting[key]
+            queue.remove(ticket)
+            if not queue:
+                del self._waiting[key]
+            self._waiting_count -= 1
+
+        raise AdmissionRejected("queue_timeout", self._timeout)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiting:
+                key, queue = self._waiting.popitem(last=False)
+                ticket = queue.popleft()
+                if queue:
+                    self._waiting[key] = queue
+                self._waiting_count -= 1
+                ticket.granted = True
+                ticket.event.set()
+                return
+
+            self._active -= 1
+
+    @contextmanager
+    def admit(self, key: str) -> Iterator[None]:
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def create_backend(name: str) -> RateLimitBackend:
+    if name == "memory":
+        return InMemoryRateLimitBackend(max_keys=config.RATE_LIMIT_MAX_KEYS)
+    if name == "local_shared":
+        return SharedStoreRateLimitBackend(
+            LocalSharedStore(max_keys=config.RATE_LIMIT_MAX_KEYS, sweep_interval=config.RATE_LIMIT_SWEEP_INTERVAL)
+        )
+    raise ValueError(f"Невідомий бекенд лімітів: {name}")
+
+
+def _build_rules() -> Dict[str, Tuple[float, float]]:
+    limits = {
+        "user": (config.RATE_LIMIT_USER_PER_MINUTE, config.RATE_LIMIT_USER_BURST),
+        "space": (config.RATE_LIMIT_SPACE_PER_MINUTE, config.RATE_LIMIT_SPACE_BURST),
+    }
+    return {scope: (limit / 60.0, float(max(burst, 1))) for scope, (limit, burst) in limits.items() if limit > 0}
+
+
+rules = _build_rules()
+
+rate_limit_backend = create_backend(config.RATE_LIMIT_BACKEND)
+rate_limiter = RateLimiter(rate_limit_backend, rules)
+search_queue = FairAdmissionQueue(
+    max_concurrent=config.SEARCH_MAX_CONCURRENT,
+    max_waiting=config.SEARCH_QUEUE_MAX_WAITING,
+    timeout=config.SEARCH_QUEUE_TIMEOUT
+)
+
+memory_registry.register("rate_limiter", lambda: {**rate_limit_backend.stats, **search_queue.stats})
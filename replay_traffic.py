@@ -0,0 +1,164 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+REPLAY_ENV = {
+    "CREDENTIALS_MODE": "anonymous",
+    "PREWARM_ENABLED": "false",
+    "TENANTS_HOT_RELOAD": "false",
+}
+
+for key, value in REPLAY_ENV.items():
+    os.environ.setdefault(key, value)
+os.environ["CAPTURE_DIR"] = ""
+
+from flask import Flask, request  # noqa: E402
+from logger import get_logger  # noqa: E402
+from gcp_clients import clients  # noqa: E402
+from search_cache import search_cache  # noqa: E402
+from traffic_capture import load_capture, ReplaySearchClient  # noqa: E402
+import main  # noqa: E402
+
+logger = get_logger(__name__)
+
+
+def build_schedule(events: List[Dict[str, Any]], mode: str, rate: float, burst_size: int,
+                   burst_interval: float, speed: float, limit: int) -> List[float]:
+    count = min(len(events), limit) if limit else len(events)
+
+    if mode == "constant":
+        return [i / rate for i in range(count)]
+
+    if mode == "burst":
+        return [(i // burst_size) * burst_interval for i in range(count)]
+
+    if mode == "recorded":
+        first_ts = events[0]["ts"]
+        return [(event["ts"] - first_ts) / speed for event in events[:count]]
+
+    raise ValueError(f"Невідомий режим: {mode}")
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ReplayStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies_ms: List[float] = []
+        self.lags_ms: List[float] = []
+        self.outcomes: Dict[str, int] = {}
+
+    def add(self, outcome: str, latency_ms: float, lag_ms: float) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.latencies_ms.append(latency_ms)
+            self.lags_ms.append(lag_ms)
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        total = len(self.latencies_ms)
+        errors = self.outcomes.get("error", 0)
+        return {
+            "requests": total,
+            "duration_s": round(duration, 2),
+            "throughput_rps": round(total / duration, 2) if duration else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "latency_ms": {
+                "p50": round(_percentile(self.latencies_ms, 50), 1),
+                "p90": round(_percentile(self.latencies_ms, 90), 1),
+                "p99": round(_percentile(self.latencies_ms, 99), 1),
+                "max": round(max(self.latencies_ms, default=0.0), 1),
+            },
+            "dispatch_lag_ms": {
+                "p50": round(_percentile(self.lags_ms, 50), 1),
+                "p99": round(_percentile(self.lags_ms, 99), 1),
+            }
+        }
+
+
+def _classify(status_code: int, body: bytes) -> str:
+    if status_code >= 500:
+        return "error"
+    if body == main.RATE_LIMITED_CARD:
+        return "rate_limited"
+    if body == main.QUEUE_BUSY_CARD:
+        return "queue_busy"
+    return "ok"
+
+
+def _send(app: Flask, event: Dict[str, Any], scheduled_at: float, stats: ReplayStats) -> None:
+    start_time = time.perf_counter()
+    lag_ms = max(0.0, (start_time - scheduled_at) * 1000)
+    try:
+        with app.test_request_context('/', method='POST', json=event):
+            response = app.make_response(main.chat_vertex_bot(request))
+        outcome = _classify(response.status_code, response.get_data())
+    except Exception as e:
+        logger.error(f"❌ Помилка відтворення: {e}")
+        outcome = "error"
+    stats.add(outcome, (time.perf_counter() - start_time) * 1000, lag_ms)
+
+
+def replay(events: List[Dict[str, Any]], schedule: List[float], concurrency: int) -> Dict[str, Any]:
+    app = Flask("replay")
+    stats = ReplayStats()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start_time = time.perf_counter()
+        for record, offset in zip(events, schedule):
+            scheduled_at = start_time + offset
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(_send, app, record["event"], scheduled_at, stats)
+
+    return stats.report(time.perf_counter() - start_time)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Відтворення записаного трафіку Google Chat")
+    parser.add_argument("captures", nargs="+", help="Файли або glob-шаблони capture-*.jsonl")
+    parser.add_argument("--mode", choices=["constant", "burst", "recorded"], default="constant")
+    parser.add_argument("--rate", type=float, default=10.0, help="Запитів на секунду (constant)")
+    parser.add_argument("--burst-size", type=int, default=20)
+    parser.add_argument("--burst-interval", type=float, default=5.0, help="Секунд між пачками (burst)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Прискорення записаного таймінгу (recorded)")
+    parser.add_argument("--limit", type=int, default=0, help="Максимум подій (0 - всі)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--no-latency", action="store_true", help="Не імітувати затримку Discovery Engine")
+    parser.add_argument("--use-cache", action="store_true", help="Залишити кеш результатів увімкненим")
+    parser.add_argument("--report", help="Зберегти звіт у JSON файл")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.captures for path in glob.glob(pattern)})
+    events, responses = load_capture(paths)
+    if not events:
+        raise SystemExit("❌ У файлах немає записаних подій")
+
+    logger.info(f"📼 Завантажено подій: {len(events)}, відповідей: {len(responses)}")
+
+    clients.override_client('discovery_engine', ReplaySearchClient(responses, simulate_latency=not args.no_latency))
+    search_cache.enabled = args.use_cache
+
+    schedule = build_schedule(events, args.mode, args.rate, args.burst_size, args.burst_interval, args.speed, args.limit)
+    report = replay(events, schedule, args.concurrency)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Hashable
+from cachetools import TTLCache
+from config import config
+from logger import get_logger
+from memory_accounting import estimate_size, memory_registry
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    data: Dict[str, Any]
+    created_at: float
+    expires_at: float
+    etag: str = field(default="")
+    size: int = field(default=0)
+
+    @property
+    def ttl_remaining(self) -> float:
+        return max(0.0, self.expires_at - time.time())
+
+
+class SearchCache:
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int = 0) -> None:
+        self.enabled = True
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        if max_bytes:
+            self._entries: TTLCache = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=lambda entry: entry.size)
+        else:
+            self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._entries.currsize if self._max_bytes else sum(entry.size for entry in self._entries.values()),
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Hashable, data: Dict[str, Any]) -> CacheEntry:
+        now = time.time()
+        digest = hashlib.blake2b(f"{key!r}|{now}".encode('utf-8'), digest_size=8).hexdigest()
+        entry = CacheEntry(data=data, created_at=now, expires_at=now + self._ttl, etag=digest, size=estimate_size(data))
+        if not self.enabled:
+            return entry
+        with self._lock:
+            try:
+                self._entries[key] = entry
+            except ValueError:
+                logger.warning(f"⚠️ Результат завеликий для кешу ({entry.size} байт), не кешуємо")
+                return entry
+
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem()
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = SearchCache(
+    maxsize=config.SEARCH_CACHE_MAX_ENTRIES,
+    ttl=config.SEARCH_CACHE_TTL,
+    max_bytes=config.SEARCH_CACHE_MAX_BYTES
+)
+memory_registry.register("search_cache", lambda: search_cache.stats)
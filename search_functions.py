@@ -1,19 +1,19 @@
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 from google.cloud import discoveryengine_v1
-from config import config
 from logger import get_logger
 from gcp_clients import clients
-from utils import clean_html_text, get_file_emoji, extract_filename_from_title, split_snippet_to_bullets, format_summary
+from tenants import tenants, TenantProfile
+from search_cache import search_cache, CacheEntry
+from traffic_capture import traffic_recorder
+from postprocess import process_search_results, postprocessor
+from query_normalizer import prepare_query, spell_corrections
+from utils import extract_filename_from_title, split_snippet_to_bullets, gcs_to_https
 
 logger = get_logger(__name__)
 
 
-def _create_search_request(query: str) -> discoveryengine_v1.SearchRequest:
-    serving_config = (
-        f"projects/{config.PROJECT_ID}/locations/{config.LOCATION}/collections/default_collection/"
-        f"engines/{config.SEARCH_ENGINE_ID}/servingConfigs/default_search"
-    )
-
+def _build_request_template(profile: TenantProfile, with_summary: bool = True) -> discoveryengine_v1.SearchRequest:
     summary_spec = discoveryengine_v1.SearchRequest.ContentSearchSpec.SummarySpec(
         summary_result_count=10,
         include_citations=True,
@@ -22,19 +22,11 @@ def _create_search_request(query: str) -> discoveryengine_v1.SearchRequest:
         model_spec=discoveryengine_v1.SearchRequest.ContentSearchSpec.SummarySpec.ModelSpec(
             version="stable"
         ),
-        model_prompt_spec=discoveryengine_v1.SearchRequest.ContentSearchSpec.SummarySpec.ModelPromptSpec(
-            preamble=(
-                f"Створіть детальний підсумок українською мовою специфічно для запиту '{query}'. "
-                "Використовуйте ТІЛЬКИ релевантну інформацію з результатів пошуку. "
-                "Відповідь має бути структурована як список з bullet points, кожен пункт починається з '•'. "
-                "Максимум 30 речень. Фокусуйтеся на практичних деталях."
-            )
-        )
+        model_prompt_spec=discoveryengine_v1.SearchRequest.ContentSearchSpec.SummarySpec.ModelPromptSpec()
     )
 
     return discoveryengine_v1.SearchRequest(
-        serving_config=serving_config,
-        query=query,
+        serving_config=profile.serving_config,
         page_size=10,
         language_code="uk-UA",
         user_info=discoveryengine_v1.UserInfo(
@@ -49,46 +41,39 @@ def _create_search_request(query: str) -> discoveryengine_v1.SearchRequest:
                 return_snippet=True,
                 max_snippet_count=3
             ),
-            summary_spec=summary_spec
+            summary_spec=summary_spec if with_summary else None
         )
     )
 
 
-def _process_search_results(response) -> tuple[str, List[Dict]]:
-    summary_text = ""
-    if hasattr(response, 'summary') and response.summary:
-        if hasattr(response.summary, 'summary_text') and response.summary.summary_text:
-            summary_text = response.summary.summary_text
-
-    results = []
-    for result in response.results:
-        document = result.document
-        title, snippet, link = "", "", ""
-
-        if hasattr(document, 'derived_struct_data'):
-            derived_data = dict(document.derived_struct_data)
-            title = derived_data.get("title", "")
-            link = derived_data.get("link", "")
-
-            snippets_array = derived_data.get("snippets", [])
-            if snippets_array:
-                snippet_parts = []
-                for snippet_obj in snippets_array:
-                    snippet_dict = dict(snippet_obj)
-                    if snippet_dict.get("snippet_status") == "SUCCESS":
-                        clean_text = clean_html_text(snippet_dict.get("snippet", ""))
-                        if clean_text:
-                            snippet_parts.append(clean_text)
-                snippet = " ".join(snippet_parts)
+def _build_documents_request_template(profile: TenantProfile) -> discoveryengine_v1.SearchRequest:
+    return _build_request_template(profile, with_summary=False)
+
+
+def _create_search_request(query: str, profile: TenantProfile,
+                           skip_spell_correction: bool = False) -> discoveryengine_v1.SearchRequest:
+    request = discoveryengine_v1.SearchRequest(clients.get_request_template(profile, _build_request_template))
+    request.query = query
+    if skip_spell_correction:
+        request.spell_correction_spec.mode = discoveryengine_v1.SearchRequest.SpellCorrectionSpec.Mode.SUGGESTION_ONLY
+    request.content_search_spec.summary_spec.model_prompt_spec.preamble = profile.render_preamble(query)
+    return request
 
-        filename = extract_filename_from_title(title)
-        results.append({
-            "title": filename,
-            "snippet": snippet or "фрагмент відсутній",
-            "link": link
-        })
 
-    return summary_text, results
+def _create_documents_request(query: str, profile: TenantProfile,
+                              skip_spell_correction: bool = False) -> discoveryengine_v1.SearchRequest:
+    request = discoveryengine_v1.SearchRequest(
+        clients.get_request_template(profile, _build_documents_request_template, variant="documents")
+    )
+    request.query = query
+    if skip_spell_correction:
+        request.spell_correction_spec.mode = discoveryengine_v1.SearchRequest.SpellCorrectionSpec.Mode.SUGGESTION_ONLY
+    return request
+
+
+def _first_page(response) -> discoveryengine_v1.SearchResponse:
+    pages = getattr(response, 'pages', None)
+    return next(iter(pages)) if pages is not None else response
 
 
 def _format_search_results(results: List[Dict], query: str, summary: str = None) -> str:
@@ -104,11 +89,7 @@ def _format_search_results(results: List[Dict], query: str, summary: str = None)
     for result in results:
         title = result["title"]
         snippet = result["snippet"]
-        link = result["link"]
-
-        if link.startswith("gs://"):
-            path = link.replace("gs://", "")
-            link = f"https://storage.cloud.google.com/{path}"
+        link = gcs_to_https(result["link"])
 
         filename = extract_filename_from_title(title)
         item_text = f"📎 **{filename}**\n{link}\n"
@@ -131,30 +112,83 @@ def _format_search_results(results: List[Dict], query: str, summary: str = None)
     return "".join(response_parts)
 
 
-def search_vertex_ai_structured(query: str) -> Dict[str, Any]:
+def search_vertex_ai_cached(query: str, space_id: Optional[str] = None, refresh: bool = False) -> CacheEntry:
+    profile = tenants.get_profile(space_id)
+    normalized, query, skip_spell_correction = prepare_query(query, profile)
+    cache_key = (profile, query)
+
+    entry = None if refresh else search_cache.get(cache_key)
+    if entry is not None:
+        logger.info(f"⚡ Результат з кешу (профіль: {profile.name})")
+        return entry
+
     try:
-        client = clients.get_search_client()
-        request = _create_search_request(query)
-        response = client.search(request=request)
+        request = _create_search_request(query, profile, skip_spell_correction)
+        raw_search = clients.get_raw_search(profile) if postprocessor.offloaded else None
+        start_time = time.perf_counter()
+
+        if raw_search is not None:
+            payload = raw_search(request)
+            traffic_recorder.record_payload(request, payload, (time.perf_counter() - start_time) * 1000)
+            (summary_bullets, results), corrected_query = postprocessor.process_payload(payload)
+        else:
+            response = _first_page(clients.get_search_client(profile).search(request=request))
+            traffic_recorder.record_response(request, response, (time.perf_counter() - start_time) * 1000)
+            summary_bullets, results = postprocessor.process(response)
+            corrected_query = response.corrected_query
 
-        logger.info("🔍 Виконання пошуку через Vertex AI")
+        logger.info(f"🔍 Виконання пошуку через Vertex AI (профіль: {profile.name})")
 
-        summary_text, results = _process_search_results(response)
+        if not skip_spell_correction:
+            query = spell_corrections.learn(profile, normalized, corrected_query)
+            cache_key = (profile, query)
 
         logger.info("✅ Структурований пошук успішно завершено")
 
-        return {
+        return search_cache.put(cache_key, {
             "query": query,
-            "summary": format_summary(summary_text) if summary_text else "",
+            "summary": "\n".join(bullet["text"] for bullet in summary_bullets),
+            "summary_bullets": summary_bullets,
             "results": results,
             "total_results": len(results)
-        }
+        })
 
     except Exception as e:
         logger.error(f"❌ Помилка структурованого пошуку: {e}")
         raise e
 
 
+def peek_search_cache(query: str, space_id: Optional[str] = None) -> Optional[CacheEntry]:
+    profile = tenants.get_profile(space_id)
+    _, query, _ = prepare_query(query, profile)
+    return search_cache.peek((profile, query))
+
+
+def search_vertex_ai_structured(query: str, space_id: Optional[str] = None) -> Dict[str, Any]:
+    return search_vertex_ai_cached(query, space_id).data
+
+
+def search_vertex_ai_documents(query: str, space_id: Optional[str] = None) -> List[Dict]:
+    cached = peek_search_cache(query, space_id)
+    if cached is not None:
+        return cached.data["results"]
+
+    try:
+        profile = tenants.get_profile(space_id)
+        _, query, skip_spell_correction = prepare_query(query, profile)
+        client = clients.get_search_client(profile)
+        response = client.search(request=_create_documents_request(query, profile, skip_spell_correction))
+
+        logger.info(f"🔍 Швидкий пошук документів без підсумку (профіль: {profile.name})")
+
+        _, results = process_search_results(response)
+        return results
+
+    except Exception as e:
+        logger.error(f"❌ Помилка пошуку документів: {e}")
+        raise e
+
+
 def search_vertex_ai(query: str) -> str:
     try:
         search_data = search_vertex_ai_structured(query)
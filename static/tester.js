@@ -0,0 +1,4 @@
+function toggleRawData() {
+    var rawData = document.getElementById('raw-data');
+    rawData.style.display = rawData.style.display === 'none' ? 'block' : 'none';
+}
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Callable, List, Any
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PROFILE_NAME = "default"
+
+DEFAULT_PREAMBLE = (
+    "Створіть детальний підсумок українською мовою специфічно для запиту '{query}'. "
+    "Використовуйте ТІЛЬКИ релевантну інформацію з результатів пошуку. "
+    "Відповідь має бути структурована як список з bullet points, кожен пункт починається з '•'. "
+    "Максимум 30 речень. Фокусуйтеся на практичних деталях."
+)
+
+
+@dataclass(frozen=True)
+class TenantProfile:
+    name: str
+    project_id: str
+    location: str
+    search_engine_id: str
+    preamble: str = DEFAULT_PREAMBLE
+
+    @property
+    def serving_config(self) -> str:
+        return (
+            f"projects/{self.project_id}/locations/{self.location}/collections/default_collection/"
+            f"engines/{self.search_engine_id}/servingConfigs/default_search"
+        )
+
+    def render_preamble(self, query: str) -> str:
+        return self.preamble.replace("{query}", query)
+
+
+@dataclass(frozen=True)
+class _TenantSnapshot:
+    default: TenantProfile
+    profiles: Dict[str, TenantProfile]
+    spaces: Dict[str, TenantProfile]
+
+
+def _profile_from_env() -> TenantProfile:
+    return TenantProfile(
+        name=DEFAULT_PROFILE_NAME,
+        project_id=config.PROJECT_ID or "",
+        location=config.LOCATION or "",
+        search_engine_id=config.SEARCH_ENGINE_ID or ""
+    )
+
+
+def _parse_profile(name: str, data: Dict[str, Any]) -> TenantProfile:
+    profile = TenantProfile(
+        name=name,
+        project_id=data.get("project_id") or config.PROJECT_ID or "",
+        location=data.get("location") or config.LOCATION or "",
+        search_engine_id=data.get("search_engine_id") or config.SEARCH_ENGINE_ID or "",
+        preamble=data.get("preamble") or DEFAULT_PREAMBLE
+    )
+
+    missing = [field for field in ("project_id", "location", "search_engine_id") if not getattr(profile, field)]
+    if missing:
+        raise ValueError(f"Профіль '{name}': відсутні поля {', '.join(missing)}")
+
+    return profile
+
+
+def _load_snapshot(path: str) -> _TenantSnapshot:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    profiles = {name: _parse_profile(name, body) for name, body in data.get("profiles", {}).items()}
+    if not profiles:
+        raise ValueError(f"У файлі {path} не задано жодного профілю")
+
+    default_name = data.get("default", DEFAULT_PROFILE_NAME)
+    if default_name not in profiles:
+        raise ValueError(f"Профіль за замовчуванням '{default_name}' не знайдено")
+
+    spaces = {}
+    for space_id, profile_name in data.get("spaces", {}).items():
+        if profile_name not in profiles:
+            raise ValueError(f"Простір {space_id} посилається на невідомий профіль '{profile_name}'")
+        spaces[space_id] = profiles[profile_name]
+
+    return _TenantSnapshot(default=profiles[default_name], profiles=profiles, spaces=spaces)
+
+
+class _TenantsFileHandler(FileSystemEventHandler):
+    RELOAD_EVENTS = {"created", "modified", "moved", "closed"}
+
+    def __init__(self, registry: 'TenantRegistry', debounce: float) -> None:
+        self._registry = registry
+        self._debounce = debounce
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory or event.event_type not in self.RELOAD_EVENTS:
+            return
+
+        paths = {getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')}
+        if self._registry.path in {os.path.abspath(path) for path in paths if path}:
+            self._schedule_reload()
+
+    def _schedule_reload(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._debounce, self._registry.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+class TenantRegistry:
+    def __init__(self, path: str = "", reload_debounce: float = 0.5) -> None:
+        self.path = os.path.abspath(path) if path else ""
+        self._reload_debounce = reload_debounce
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[], None]] = []
+        self._observer: Optional[Observer] = None
+        self._handler: Optional[_TenantsFileHandler] = None
+
+        if self.path:
+            self._snapshot = _load_snapshot(self.path)
+            logger.info(f"🗂️ Завантажено профілів: {len(self._snapshot.profiles)}, просторів: {len(self._snapshot.spaces)}")
+        else:
+            default = _profile_from_env()
+            self._snapshot = _TenantSnapshot(default=default, profiles={default.name: default}, spaces={})
+
+    def get_profile(self, space_id: Optional[str] = None) -> TenantProfile:
+        snapshot = self._snapshot
+        if space_id:
+            return snapshot.spaces.get(space_id, snapshot.default)
+        return snapshot.default
+
+    def profiles(self) -> List[TenantProfile]:
+        return list(self._snapshot.profiles.values())
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.append(callback)
+
+    def reload(self) -> bool:
+        with self._lock:
+            try:
+                snapshot = _load_snapshot(self.path)
+            except Exception as e:
+                logger.error(f"❌ Помилка перезавантаження профілів, залишаємо попередні: {e}")
+                return False
+
+            if snapshot == self._snapshot:
+                return False
+
+            self._snapshot = snapshot
+
+        logger.info(f"🔄 Профілі перезавантажено: {len(snapshot.profiles)}, просторів: {len(snapshot.spaces)}")
+        for callback in self._listeners:
+            callback()
+        return True
+
+    def start_watching(self) -> None:
+        if not self.path or self._observer is not None:
+            return
+
+        self._handler = _TenantsFileHandler(self, self._reload_debounce)
+        self._observer = Observer()
+        self._observer.schedule(self._handler, os.path.dirname(self.path), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        logger.info(f"👀 Відстеження змін у {self.path}")
+
+    def stop_watching(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._handler is not None:
+            self._handler.cancel()
+            self._handler = None
+
+
+tenants = TenantRegistry(config.TENANTS_FILE)
+
+if config.TENANTS_HOT_RELOAD:
+    tenants.start_watching()
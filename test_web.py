@@ -1,17 +1,36 @@
+import gzip
+import hashlib
+import mimetypes
+import os
 import time
-from flask import Flask, request, render_template_string
-from markupsafe import Markup
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional
+from flask import Flask, Response, request, abort, stream_with_context
+from markupsafe import Markup, escape
 from config import config
 from logger import logger
-from search_functions import search_vertex_ai_structured
+from memory_accounting import memory_registry
+from search_functions import search_vertex_ai_cached, search_vertex_ai_documents, peek_search_cache
+from utils import gcs_to_https, format_citation_links
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+COMPRESSIBLE_MIMETYPES = {'text/html', 'text/css', 'text/javascript', 'application/javascript', 'application/json'}
+MIN_COMPRESS_SIZE = 512
+STATIC_MAX_AGE = 365 * 24 * 3600
+STREAM_MARKER = "<!--stream-results-->"
+STREAM_DOCUMENTS_DELAY = 0.5
+CITATION_ATTRIBUTES = ' target="_blank" class="citation"'
+
+stream_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stream-search")
 
-def _format_web_results(search_data):
-    query = search_data["query"]
-    summary = search_data["summary"]
-    results = search_data["results"]
 
-    html = f'''
+def _render_search_header(query):
+    return f'''
     <div class="search-container">
         <div class="search-header">
             <h2>🔍 Результати пошуку</h2>
@@ -19,40 +38,52 @@ def _format_web_results(search_data):
         </div>
     '''
 
-    if summary:
+
+def _render_summary_card(search_data):
+    summary = search_data["summary"]
+    summary_bullets = search_data.get("summary_bullets")
+
+    if summary_bullets:
+        formatted_summary = "".join(
+            f'<div class="summary-bullet">{escape(bullet["text"])}{format_citation_links(bullet["sources"], CITATION_ATTRIBUTES, with_titles=True)}</div>\n'
+            for bullet in summary_bullets
+        )
+    elif summary:
         summary_lines = [line.strip() for line in summary.split('\n') if line.strip()]
         formatted_summary = "".join(f'<div class="summary-bullet">{line}</div>\n' for line in summary_lines if line.startswith('•'))
+    else:
+        return ""
 
-        html += f'''
+    return f'''
         <div class="result-card summary-card">
             <div class="card-header"><h3>📄 Підсумок</h3></div>
             <div class="card-content">{formatted_summary}</div>
         </div>
         '''
 
-    if results:
-        html += '<div class="result-card"><div class="card-header"><h3>📋 Детальні результати</h3></div><div class="card-content">'
 
-        for i, result in enumerate(results, 1):
-            title = result["title"]
-            snippet = result["snippet"]
-            link = result["link"]
+def _iter_document_cards(results):
+    if not results:
+        return
+
+    yield '<div class="result-card"><div class="card-header"><h3>📋 Детальні результати</h3></div><div class="card-content">'
 
-            if link.startswith("gs://"):
-                path = link.replace("gs://", "")
-                link = f"https://storage.cloud.google.com/{path}"
+    for i, result in enumerate(results, 1):
+        title = result["title"]
+        snippet = result["snippet"]
+        link = gcs_to_https(result["link"])
 
-            emoji = "📄"
-            if any(ext in title.lower() for ext in [".xlsx", ".xls", ".csv"]):
-                emoji = "📊"
-            elif ".doc" in title.lower():
-                emoji = "📝"
+        emoji = "📄"
+        if any(ext in title.lower() for ext in [".xlsx", ".xls", ".csv"]):
+            emoji = "📊"
+        elif ".doc" in title.lower():
+            emoji = "📝"
 
-            html += f'''
+        yield f'''
             <div class="document-card">
                 <div class="doc-header">
                     <span class="doc-label">{emoji} Документ {i}</span>
-                    <a href="{link}" target="_blank" class="open-btn">📎 Відкрити</a>
+                    <a href="{escape(link)}" target="_blank" class="open-btn">📎 Відкрити</a>
                 </div>
                 <div class="doc-title">{title}</div>
                 <div class="doc-snippet">
@@ -61,9 +92,11 @@ def _format_web_results(search_data):
             </div>
             '''
 
-        html += '</div></div>'
+    yield '</div></div>'
 
-    html += '''
+
+def _render_tips_card():
+    return '''
         <div class="result-card tips-card">
             <div class="card-header"><h3>💡 Поради</h3></div>
             <div class="card-content">
@@ -74,10 +107,105 @@ def _format_web_results(search_data):
     </div>
     '''
 
-    return html
+
+def _iter_web_results(search_data):
+    yield _render_search_header(search_data["query"])
+    yield _render_summary_card(search_data)
+    yield from _iter_document_cards(search_data["results"])
+    yield _render_tips_card()
+
+
+def _format_web_results(search_data):
+    return "".join(_iter_web_results(search_data))
 
 
-app = Flask(__name__)
+def _iter_search_stream(query):
+    head, tail = INDEX_TEMPLATE.render(
+        query=query, result=Markup(STREAM_MARKER), error=False, metadata=None, stream=True, asset_version=ASSET_VERSION
+    ).split(STREAM_MARKER, 1)
+    yield head
+
+    start_time = time.time()
+    container_open = False
+    try:
+        cached = peek_search_cache(query)
+        if cached is not None:
+            yield from _iter_web_results(cached.data)
+        else:
+            yield _render_search_header(query)
+            container_open = True
+
+            full_search = stream_executor.submit(search_vertex_ai_cached, query)
+            documents = None
+
+            if not wait([full_search], timeout=STREAM_DOCUMENTS_DELAY).done:
+                documents_search = stream_executor.submit(search_vertex_ai_documents, query)
+                wait([full_search, documents_search], return_when=FIRST_COMPLETED)
+
+                if not full_search.done() and documents_search.exception() is None:
+                    documents = documents_search.result()
+                    logger.info(f"📋 Документи готові за {round(time.time() - start_time, 2)}с")
+                    yield from _iter_document_cards(documents)
+                    yield '<div id="summary-pending" class="result-card summary-card"><div class="card-content">⏳ Формуємо підсумок...</div></div>'
+
+            search_data = full_search.result().data
+            logger.info(f"📄 Підсумок готовий за {round(time.time() - start_time, 2)}с")
+
+            if documents is None:
+                yield from _iter_document_cards(search_data['results'])
+            else:
+                yield '<style>#summary-pending { display: none; }</style>'
+            yield _render_summary_card(search_data)
+            yield _render_tips_card()
+            container_open = False
+
+    except Exception as e:
+        logger.error(f"❌ Помилка потокового пошуку: {e}")
+        yield f'<div class="error">❌ Помилка: {escape(str(e))}</div>'
+        if container_open:
+            yield '</div>'
+
+    yield tail
+
+
+def _compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+
+def _choose_encoding() -> Optional[str]:
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _load_static_assets() -> Dict[str, Dict[str, Any]]:
+    assets = {}
+    for name in sorted(os.listdir(STATIC_DIR)):
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            body = f.read()
+
+        bodies = {'identity': body, 'gzip': _compress(body, 'gzip', best=True)}
+        if brotli is not None:
+            bodies['br'] = _compress(body, 'br', best=True)
+
+        assets[name] = {
+            'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            'etag': hashlib.blake2b(body, digest_size=8).hexdigest(),
+            'bodies': bodies
+        }
+    return assets
+
+
+STATIC_ASSETS = _load_static_assets()
+ASSET_VERSION = hashlib.blake2b(
+    "".join(asset['etag'] for asset in STATIC_ASSETS.values()).encode(), digest_size=6
+).hexdigest()
+
+app = Flask(__name__, static_folder=None)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -86,50 +214,8 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Vertex AI Search Bot - Тестер</title>
-    <style>
-        body { font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; background-color: #f5f5f5; }
-        .container { background: white; padding: 30px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-        h1 { color: #333; text-align: center; margin-bottom: 30px; }
-        .form-group { margin-bottom: 20px; }
-        label { display: block; margin-bottom: 10px; font-weight: bold; color: #555; }
-        input[type="text"] { width: 100%; padding: 14px 16px; border: 2px solid #e9ecef; border-radius: 8px; font-size: 16px; box-sizing: border-box; }
-        input[type="text"]:focus { border-color: #4285f4; outline: none; box-shadow: 0 0 0 3px rgba(66, 133, 244, 0.1); }
-        button { background: linear-gradient(135deg, #4285f4 0%, #34a853 100%); color: white; padding: 14px 32px; border: none; border-radius: 8px; font-size: 16px; cursor: pointer; }
-        button:hover { background: linear-gradient(135deg, #3367d6 0%, #2d8f47 100%); }
-        .quick-tests { margin: 25px 0; padding: 20px; background: #f8f9fa; border-radius: 10px; }
-        .quick-test-btn { display: inline-block; margin: 5px; padding: 10px 16px; background: #6c757d; color: white; text-decoration: none; border-radius: 6px; font-size: 14px; }
-        .quick-test-btn:hover { background: #5a6268; text-decoration: none; color: white; }
-        .result { margin-top: 30px; }
-        .error { background-color: #f8d7da; color: #721c24; padding: 20px; border-radius: 5px; }
-        .search-header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 12px; margin-bottom: 20px; }
-        .search-header h2 { margin: 0 0 8px 0; font-size: 24px; }
-        .search-query { margin: 0; opacity: 0.9; }
-        .query-text { background: rgba(255,255,255,0.2); padding: 4px 8px; border-radius: 4px; font-weight: bold; }
-        .result-card { background: white; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); margin-bottom: 20px; overflow: hidden; }
-        .card-header { background: #f8f9fa; padding: 16px 20px; border-bottom: 1px solid #e9ecef; }
-        .card-header h3 { margin: 0; color: #495057; font-size: 18px; }
-        .card-content { padding: 20px; line-height: 1.6; }
-        .summary-card { border-left: 4px solid #28a745; }
-        .tips-card { border-left: 4px solid #ffc107; }
-        .bullet { color: #007bff; font-weight: bold; margin-right: 8px; }
-        .summary-bullet { margin-bottom: 12px; padding: 8px 0; line-height: 1.5; color: #495057; }
-        .document-card { background: #f8f9fa; border: 1px solid #e9ecef; border-radius: 8px; padding: 16px; margin-bottom: 16px; }
-        .doc-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 12px; }
-        .doc-label { background: #6c757d; color: white; padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: bold; }
-        .open-btn { background: #007bff; color: white !important; padding: 8px 16px; border-radius: 6px; text-decoration: none !important; font-size: 14px; }
-        .open-btn:hover { background: #0056b3; }
-        .doc-title { font-weight: bold; color: #212529; margin-bottom: 8px; font-size: 16px; }
-        .doc-snippet { color: #6c757d; font-style: italic; font-size: 14px; line-height: 1.5; }
-        .metadata { margin-top: 20px; padding: 15px; background: #e3f2fd; border-radius: 8px; font-size: 14px; color: #1565c0; }
-        .raw-data { margin-top: 15px; padding: 15px; background: #f8f9fa; border: 1px solid #dee2e6; border-radius: 5px; max-height: 400px; overflow-y: auto; }
-        .raw-data-toggle { background: #007bff; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; font-size: 12px; margin-top: 10px; }
-    </style>
-    <script>
-        function toggleRawData() {
-            var rawData = document.getElementById('raw-data');
-            rawData.style.display = rawData.style.display === 'none' ? 'block' : 'none';
-        }
-    </script>
+    <link rel="stylesheet" href="/static/tester.css?v={{ asset_version }}">
+    <script src="/static/tester.js?v={{ asset_version }}" defer></script>
 </head>
 <body>
     <div class="container">
@@ -140,6 +226,7 @@ HTML_TEMPLATE = """
             <div class="form-group">
                 <label for="query">Введіть пошуковий запит:</label>
                 <input type="text" id="query" name="query" value="{{ query or '' }}" placeholder="наприклад: імпорт прайсів" required>
+                <label class="stream-toggle"><input type="checkbox" name="stream" value="1" {% if stream %}checked{% endif %}> ⚡ Потоковий режим (документи до готовності підсумку)</label>
             </div>
             <button type="submit">🔍 Виконати пошук</button>
         </form>
@@ -181,23 +268,50 @@ HTML_TEMPLATE = """
 """
 
 
+INDEX_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+
+def _set_search_cache_headers(response: Response, etag: str, max_age: float) -> None:
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = int(max_age)
+
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     query = None
     result = None
     error = False
     metadata = None
+    entry = None
 
     if request.method == 'POST':
         query = request.form.get('query', '').strip()
     elif request.method == 'GET':
         query = request.args.get('q', '').strip()
 
+    stream = request.values.get('stream') == '1'
+
+    if query and stream:
+        logger.info(f"⚡ Потоковий пошук: {query}")
+        response = Response(stream_with_context(_iter_search_stream(query)), mimetype='text/html')
+        response.cache_control.no_store = True
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    if query and request.method == 'GET':
+        cached = peek_search_cache(query)
+        if cached is not None and request.if_none_match.contains_weak(f"{cached.etag}-{ASSET_VERSION}"):
+            response = Response(status=304)
+            _set_search_cache_headers(response, f"{cached.etag}-{ASSET_VERSION}", cached.ttl_remaining)
+            return response
+
     if query:
         try:
             logger.info(f"🔍 Тестую запит: {query}")
             start_time = time.time()
-            search_data = search_vertex_ai_structured(query)
+            entry = search_vertex_ai_cached(query)
+            search_data = entry.data
             execution_time = round(time.time() - start_time, 2)
 
             result = Markup(_format_web_results(search_data))
@@ -214,9 +328,61 @@ def index():
         except Exception as e:
             result = Markup(f"❌ Помилка: {e}<br><br>Перевірте:<br>• Файл .env налаштовано<br>• Credentials налаштовані<br>• Права доступу до Vertex AI")
             error = True
+            entry = None
             logger.error(f"❌ Помилка: {e}")
 
-    return render_template_string(HTML_TEMPLATE, query=query, result=result, error=error, metadata=metadata)
+    response = Response(INDEX_TEMPLATE.render(
+        query=query, result=result, error=error, metadata=metadata, stream=stream, asset_version=ASSET_VERSION
+    ), mimetype='text/html')
+
+    if entry is not None and request.method == 'GET':
+        _set_search_cache_headers(response, f"{entry.etag}-{ASSET_VERSION}", entry.ttl_remaining)
+    else:
+        response.cache_control.no_store = True
+
+    return response
+
+
+@app.route('/static/<name>')
+def static_asset(name: str):
+    asset = STATIC_ASSETS.get(name)
+    if asset is None:
+        abort(404)
+
+    encoding = _choose_encoding() or 'identity'
+
+    response = Response(asset['bodies'][encoding], mimetype=asset['mimetype'])
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset['etag']}-{encoding}")
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_MAX_AGE if request.args.get('v') == ASSET_VERSION else 300
+    return response.make_conditional(request)
+
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = _choose_encoding()
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    response.set_data(_compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.route('/debug/memory')
+def debug_memory():
+    if not (app.debug or config.MEMORY_DEBUG):
+        abort(404)
+    return {**memory_registry.report(), "snapshot": memory_registry.snapshot()}
 
 
 @app.route('/health')
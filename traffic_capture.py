@@ -0,0 +1,155 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple, Iterator, Callable
+from google.cloud import discoveryengine_v1
+from config import config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+EVENT_RECORD = "event"
+RESPONSE_RECORD = "response"
+
+
+def _hash_identifier(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return value
+    return "anon/" + hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def sanitize_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    message = event.get('message', {})
+    space = event.get('space', {})
+    user = event.get('user', {})
+
+    return {
+        "type": event.get('type'),
+        "message": {"text": message.get('text', '')},
+        "space": {"name": space.get('name'), "type": space.get('type')},
+        "user": {"name": _hash_identifier(user.get('name'))}
+    }
+
+
+class TrafficRecorder:
+    def __init__(self, directory: str = "", sample_rate: float = 1.0) -> None:
+        self._directory = directory
+        self._sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_day = None
+        self._recorded_responses = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._directory)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        day = time.strftime("%Y%m%d")
+
+        with self._lock:
+            if self._file is None or self._file_day != day:
+                if self._file is not None:
+                    self._file.close()
+                os.makedirs(self._directory, exist_ok=True)
+                path = os.path.join(self._directory, f"capture-{day}-{os.getpid()}.jsonl")
+                self._file = open(path, "a", encoding="utf-8", buffering=1)
+                self._file_day = day
+                self._recorded_responses.clear()
+            self._file.write(line)
+
+    def record_event(self, event: Dict[str, Any]) -> None:
+        if not self.enabled or random.random() >= self._sample_rate:
+            return
+        try:
+            self._write({"kind": EVENT_RECORD, "ts": round(time.time(), 3), "event": sanitize_event(event)})
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося записати подію: {e}")
+
+    def _claim_response(self, request: discoveryengine_v1.SearchRequest) -> bool:
+        if not self.enabled:
+            return False
+
+        key = (request.serving_config, request.query)
+        with self._lock:
+            if key in self._recorded_responses:
+                return False
+            self._recorded_responses.add(key)
+            return True
+
+    def record_response(self, request: discoveryengine_v1.SearchRequest,
+                        response: discoveryengine_v1.SearchResponse, latency_ms: float) -> None:
+        if self._claim_response(request):
+            self._write_response(request, lambda: discoveryengine_v1.SearchResponse.serialize(response), latency_ms)
+
+    def record_payload(self, request: discoveryengine_v1.SearchRequest, payload: bytes, latency_ms: float) -> None:
+        if self._claim_response(request):
+            self._write_response(request, lambda: payload, latency_ms)
+
+    def _write_response(self, request: discoveryengine_v1.SearchRequest, payload: Callable[[], bytes],
+                        latency_ms: float) -> None:
+        try:
+            self._write({
+                "kind": RESPONSE_RECORD,
+                "ts": round(time.time(), 3),
+                "serving_config": request.serving_config,
+                "query": request.query,
+                "latency_ms": round(latency_ms, 1),
+                "response": base64.b64encode(payload()).decode('ascii')
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Не вдалося записати відповідь Discovery Engine: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def iter_capture_records(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def load_capture(paths: List[str]) -> Tuple[List[Dict[str, Any]], Dict[Tuple[str, str], Dict[str, Any]]]:
+    events, responses = [], {}
+    for record in iter_capture_records(paths):
+        if record["kind"] == EVENT_RECORD:
+            events.append(record)
+        elif record["kind"] == RESPONSE_RECORD:
+            responses[(record["serving_config"], record["query"])] = record
+
+    events.sort(key=lambda record: record["ts"])
+    return events, responses
+
+
+class ReplaySearchClient:
+    def __init__(self, responses: Dict[Tuple[str, str], Dict[str, Any]], simulate_latency: bool = True) -> None:
+        self._simulate_latency = simulate_latency
+        self._responses = {
+            key: (base64.b64decode(record["response"]), record.get("latency_ms", 0.0))
+            for key, record in responses.items()
+        }
+
+    def search(self, request: discoveryengine_v1.SearchRequest) -> discoveryengine_v1.SearchResponse:
+        recorded = self._responses.get((request.serving_config, request.query))
+        if recorded is None:
+            raise LookupError(f"Немає записаної відповіді для запиту: {request.query}")
+
+        payload, latency_ms = recorded
+        if self._simulate_latency and latency_ms:
+            time.sleep(latency_ms / 1000)
+        return discoveryengine_v1.SearchResponse.deserialize(payload)
+
+
+traffic_recorder = TrafficRecorder(config.CAPTURE_DIR, config.CAPTURE_SAMPLE_RATE)
@@ -1,15 +1,20 @@
+import html
 import re
-from typing import List
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Dict, Any, Tuple
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+HTML_TAG_PATTERN = re.compile(r'<[^<>]+>')
+
 
 def clean_html_text(text: str) -> str:
     if not text:
         return ""
 
-    clean_text = re.sub(r'<[^>]+>', '', text)
+    clean_text = HTML_TAG_PATTERN.sub('', text)
 
     replacements = {
         '&nbsp;': ' ', '&#39;': "'", '&quot;': '"',
@@ -42,6 +47,8 @@ def split_snippet_to_bullets(snippet: str, max_length: int = 120) -> List[str]:
         else:
             if current_bullet:
                 bullets.append(current_bullet.strip())
+                if len(bullets) >= 3:
+                    return bullets
             current_bullet = sentence + " "
 
     if current_bullet:
@@ -118,4 +125,87 @@ def format_summary(summary_text: str) -> str:
                         sentence += '.'
                     formatted_bullets.append(f"• {sentence}")
 
-    return "\n".join(formatted_bullets[:10])
\ No newline at end of file
+    return "\n".join(formatted_bullets[:10])
+
+
+def gcs_to_https(link: str) -> str:
+    if link.startswith("gs://"):
+        return f"https://storage.cloud.google.com/{link[len('gs://'):]}"
+    return link
+
+
+def format_citation_links(sources: List[Dict], attributes: str = "", with_titles: bool = False) -> str:
+    links = []
+    for source in sources:
+        if not source.get("link"):
+            continue
+        title = f' title="{html.escape(source["title"])}"' if with_titles else ""
+        links.append(f' <a href="{html.escape(gcs_to_https(source["link"]))}"{attributes}{title}>[{source["index"]}]</a>')
+    return "".join(links)
+
+
+def _split_summary_segments(text: str) -> List[Tuple[int, int]]:
+    segments, start = [], 0
+    for i, char in enumerate(text):
+        if char == '\n' or char == '•':
+            segments.append((start, i))
+            start = i + 1
+    segments.append((start, len(text)))
+    segments = [(s, e) for s, e in segments if text[s:e].strip(' \t-*')]
+
+    if len(segments) > 1:
+        return segments
+
+    segments, start = [], 0
+    pos = text.find('. ')
+    while pos != -1:
+        segments.append((start, pos + 1))
+        start = pos + 2
+        pos = text.find('. ', start)
+    segments.append((start, len(text)))
+    return segments
+
+
+def _to_char_offsets(text: str, citations: List[Tuple[int, int, List[int]]]) -> List[Tuple[int, int, List[int]]]:
+    if not citations or text.isascii():
+        return citations
+
+    byte_offsets = list(accumulate((len(char.encode('utf-8')) for char in text), initial=0))
+    return [
+        (bisect_right(byte_offsets, start) - 1, bisect_right(byte_offsets, end) - 1, sources)
+        for start, end, sources in citations
+    ]
+
+
+def build_summary_bullets(summary: str, citations: List[Tuple[int, int, List[int]]],
+                          references: List[Dict[str, str]], max_bullets: int = 10) -> List[Dict[str, Any]]:
+    if not summary:
+        return []
+
+    citations = _to_char_offsets(summary, citations)
+    bullets = []
+
+    for start, end in _split_summary_segments(summary):
+        line = summary[start:end].strip().lstrip('-*•').strip()
+        if len(line) < 5:
+            continue
+
+        if not line.endswith('.'):
+            line += '.'
+
+        reference_indices = []
+        for cite_start, cite_end, sources in citations:
+            if cite_start < end and cite_end > start:
+                for index in sources:
+                    if index not in reference_indices and 0 <= index < len(references):
+                        reference_indices.append(index)
+
+        bullets.append({
+            "text": f"• {line}",
+            "sources": [{"index": index + 1, **references[index]} for index in sorted(reference_indices)]
+        })
+
+        if len(bullets) >= max_bullets:
+            break
+
+    return bullets